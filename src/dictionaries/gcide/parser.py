@@ -1,17 +1,53 @@
 import argparse
-import concurrent.futures
+import codecs
+import heapq
+import itertools
 import json
 import os
+import re
+import shutil
 import string
+from collections import Counter
 from bs4 import BeautifulSoup
 from html import unescape
-from itertools import repeat
-from utils.logger import logger
+from lxml import etree
+from typing import Iterable, Iterator
+from utils.build_cache import (
+    BuildCache,
+    add_build_cache_arguments,
+    get_code_version,
+    hash_file,
+)
+from utils import json_stream, ndjson, parallel
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
 from utils.graceful_exit import on_exit
+from utils.json_stream import write_entries_json
+from utils.ndjson import iter_ndjson
+from utils.parallel import add_worker_arguments, get_workers, map_chunked
+from utils.progress import Progress
 
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 STARTING_LETTERS = set(string.ascii_lowercase)
+# "stream" builds one `<p>` at a time, "bs4" builds the whole file's tree
+ENGINES = ("stream", "bs4")
+# Sources whose changes change the parsed output
+CODE_PATHS = (__file__, json_stream.__file__, ndjson.__file__, parallel.__file__)
+READ_SIZE = 1 << 16
+ENCODING = "utf-8"
+# Chunks split the letter files evenly across workers, so "s" and "c" no longer dominate
+MIN_CHUNK_BYTES = 1 << 18
+MAX_CHUNK_BYTES = 1 << 23
+CHUNKS_PER_WORKER = 4
+# Entries end with `</p>` and the next one starts a line with `<p>`
+CHUNK_BOUNDARY_PATTERN = re.compile(rb"</p>\s*\n(?=<p[\s>])")
+BOUNDARY_OVERLAP = 64
+# Most shard files open at once while merging
+MERGE_FAN_IN = 128
+# Tree building rules of BeautifulSoup's HTML builders
+ASCII_SPACES = " \n\t\x0c\r"
+STRING_CONTAINER_TAGS = {"rt", "rp", "style", "script", "template"}
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
 
 
 def main():
@@ -24,49 +60,439 @@ def main():
         default=os.path.join(SCRIPT_DIR, "downloaded_data/gcide_xml-0.53/"),
         help="Path to the input directory. Defaults to `downloaded_data/gcide_xml-0.53/`.",
     )
+    argparser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=ENGINES[0],
+        help="How to parse the XML files. 'stream' frees each entry after it is processed and uses a fraction of the memory. Defaults to 'stream'.",
+    )
+    argparser.add_argument(
+        "-o",
+        "--output-file",
+        help="Path to the output file, replaced if it exists. Defaults to a new file in `parsed/` named after the meta.",
+    )
+    add_worker_arguments(argparser, default_workers=0, chunk_unit="Bytes of XML")
+    add_build_cache_arguments(argparser)
+    add_log_arguments(argparser)
     args = argparser.parse_args()
+    configure_logging_from_args(args)
 
     input_dir = args.input_dir
 
-    # Main data store
-    parsed_data: list[dict] = []
+    # Main data store, kept in sorted shard files until export
+    parsed_data = ShardedEntries(
+        os.path.join(SCRIPT_DIR, "parsed", f".parsing_{os.getpid()}")
+    )
 
     # Handle graceful exit
     on_exit(
-        lambda: export_parsed_data(parsed_data),
+        lambda: export_parsed_data(parsed_data, args.output_file),
         message="Process interrupted. Saving processed data...",
     )
 
-    parse(parsed_data, input_dir)
+    # Parsed letter files of earlier runs
+    cache = None
+    if not args.no_build_cache:
+        cache = BuildCache(
+            os.path.join(SCRIPT_DIR, "build_cache"), get_code_version(*CODE_PATHS)
+        )
 
-    export_parsed_data(parsed_data)
+    parse(parsed_data, input_dir, args.engine, args.workers, args.chunk_size, cache)
+    if cache:
+        cache.evict_unused()
 
+    export_parsed_data(parsed_data, args.output_file)
 
-def parse(parsed_data: list[dict], dir_path: str) -> bool:
-    """Parses dictionary entries."""
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        results = executor.map(process_letter, STARTING_LETTERS, repeat(dir_path))
 
-        for result in results:
-            parsed_data.extend(result)
+def parse(
+    parsed_data: "ShardedEntries",
+    dir_path: str,
+    engine: str = ENGINES[0],
+    workers: int = 0,
+    chunk_size: int | None = None,
+    cache: BuildCache | None = None,
+) -> bool:
+    """Parses dictionary entries from balanced chunks of the letter files.
+
+    Letter files found in the build cache for the same engine are not parsed again.
+    """
+    workers = get_workers(workers)
+    file_paths = get_letter_files(dir_path)
+
+    # Shard files and held back entries of each letter file, as passed to `add_shard`
+    letter_shards: dict[str, list] = {}
+    shard_dirs = {file_path: parsed_data.dir_path for file_path, _ in file_paths}
+    keys = {}
+    if cache:
+        for file_path, _ in file_paths:
+            keys[file_path] = cache.make_key(engine.encode(), hash_file(file_path))
+            shard_dirs[file_path] = cache.get_path(keys[file_path])
+            if (result := cache.load(keys[file_path])) is not None:
+                letter_shards[file_path] = result
+
+    chunks = split_letters(
+        [item for item in file_paths if item[0] not in letter_shards],
+        workers,
+        chunk_size,
+    )
+    chunk_counts = Counter(file_path for file_path, _, _ in chunks)
+    shard_paths = [
+        os.path.join(shard_dirs[file_path], get_shard_filename(index))
+        for index, (file_path, _, _) in enumerate(chunks)
+    ]
+
+    progress = Progress("Parsing", len(chunks), unit="chunks")
+    results = zip(
+        shard_paths,
+        map_chunked(
+            process_chunk,
+            [chunk + (engine, path) for chunk, path in zip(chunks, shard_paths)],
+            workers,
+            chunk_size=1,
+        ),
+    )
+    for file_path, _ in file_paths:
+        if file_path in letter_shards:
+            for shard_filename, count, last_entry in letter_shards[file_path]:
+                parsed_data.add_shard(
+                    os.path.join(shard_dirs[file_path], shard_filename),
+                    count,
+                    last_entry,
+                )
+            continue
+        if not chunk_counts[file_path]:
+            continue
+
+        shards = []
+        complete = True
+        # Last word of the letter, which continuation blocks are attached to
+        last_entry = None
+        for shard_path, result in itertools.islice(results, chunk_counts[file_path]):
+            progress.update()
+            if result is None:
+                complete = False
+                continue
+
+            continuations, chunk_last_entry, count = result
+            if continuations and last_entry:
+                last_entry["definitions"].extend(continuations)
+            shards.append([os.path.basename(shard_path), count, chunk_last_entry])
+            parsed_data.add_shard(shard_path, count, chunk_last_entry)
+            if chunk_last_entry:
+                last_entry = chunk_last_entry
+
+        # Saved once the letter is done, as later chunks may add to held back entries
+        if cache and complete:
+            cache.save(keys[file_path], shards)
+    progress.close()
 
     logger.info(f"Parsing completed. Total entries collected: {len(parsed_data)}")
     return True
 
 
-def process_letter(letter: str, dir_path: str) -> list[dict]:
-    """Processes dictionary entries that starts with a specified letter."""
+class ShardedEntries:
+    """Parsed entries kept in sorted shard files and merged in sorted order on export.
+
+    The last entry of each chunk is kept in memory instead, as continuation
+    blocks at the start of the next chunk may still add definitions to it.
+    """
+
+    def __init__(self, dir_path: str):
+        self.dir_path = dir_path
+        # Shard paths and held back entries, in the order the entries were parsed
+        self.sources: list[str | list[dict]] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add_shard(self, path: str, count: int, last_entry: dict | None) -> None:
+        """Adds a shard written by a worker and the chunk's held back last entry."""
+        if count:
+            self.sources.append(path)
+            self.count += count
+        if last_entry:
+            self.sources.append([last_entry])
+            self.count += 1
+
+    def __iter__(self) -> Iterator[dict]:
+        """Yields the entries sorted by word, keeping the parsing order of equal words."""
+        sources = self.sources
+        index = 0
+        while len(sources) > MERGE_FAN_IN:
+            # Merge consecutive groups first so equal words stay in parsing order
+            merged = []
+            for group_start in range(0, len(sources), MERGE_FAN_IN):
+                path = os.path.join(self.dir_path, f"merged_{index:05d}.ndjson")
+                index += 1
+                write_shard(path, merge_sources(sources[group_start:][:MERGE_FAN_IN]))
+                merged.append(path)
+            sources = merged
+
+        yield from merge_sources(sources)
+
+    def discard(self) -> None:
+        """Removes the shard files."""
+        shutil.rmtree(self.dir_path, ignore_errors=True)
+
+
+def merge_sources(sources: list[str | list[dict]]) -> Iterator[dict]:
+    """Merges sorted shard files and lists of entries, preferring earlier sources on ties."""
+    files = []
     try:
-        with open(os.path.join(dir_path, f"gcide_{letter}.xml")) as in_file:
-            content = in_file.read()
-    except Exception as e:
-        logger.error(f"Error reading file: {e}")
-        return []
-
-    soup = BeautifulSoup(content, "lxml")
+        iterables = []
+        for source in sources:
+            if isinstance(source, str):
+                files.append(open(source, "r", encoding="utf-8"))
+                iterables.append(iter_ndjson(files[-1]))
+            else:
+                iterables.append(source)
+        yield from heapq.merge(*iterables, key=get_sort_key)
+    finally:
+        for file in files:
+            file.close()
+
+
+def get_shard_filename(index: int) -> str:
+    return f"shard_{index:05d}.ndjson"
+
+
+def write_shard(path: str, entries: Iterable[dict]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def get_sort_key(entry: dict) -> str:
+    """Sorts entries by word (case-insensitive)."""
+    return entry["word"].lower()
+
+
+def get_letter_files(dir_path: str) -> list[tuple[str, int]]:
+    """Gets the paths and sizes of the letter files, in letter order."""
+    file_paths = []
+    for letter in sorted(STARTING_LETTERS):
+        file_path = os.path.join(dir_path, f"gcide_{letter}.xml")
+        try:
+            file_paths.append((file_path, os.path.getsize(file_path)))
+        except OSError as e:
+            logger.error(f"Error reading file: {e}")
+    return file_paths
+
+
+def split_letters(
+    file_paths: list[tuple[str, int]], workers: int, chunk_size: int | None = None
+) -> list[tuple[str, int, int]]:
+    """Splits the letter files into chunks of similar size, in letter and file order."""
+    if not chunk_size:
+        total = sum(size for _, size in file_paths)
+        chunk_size = max(
+            MIN_CHUNK_BYTES,
+            min(MAX_CHUNK_BYTES, total // (workers * CHUNKS_PER_WORKER)),
+        )
 
-    entries = soup.find_all("p")
+    chunks = []
+    for file_path, size in file_paths:
+        try:
+            bounds = find_chunk_bounds(file_path, size, chunk_size)
+        except OSError as e:
+            logger.error(f"Error reading file: {e}")
+            continue
+        chunks.extend((file_path, start, end) for start, end in zip(bounds, bounds[1:]))
+
+    return chunks
+
+
+def find_chunk_bounds(file_path: str, size: int, chunk_size: int) -> list[int]:
+    """Finds byte offsets about a chunk size apart where a top-level `<p>` starts a line."""
+    bounds = [0]
+    with open(file_path, "rb") as in_file:
+        while bounds[-1] + chunk_size < size:
+            offset = bounds[-1] + chunk_size
+            in_file.seek(offset)
+            buffer = b""
+            while block := in_file.read(READ_SIZE):
+                buffer += block
+                if match := CHUNK_BOUNDARY_PATTERN.search(buffer):
+                    bounds.append(offset + match.end())
+                    break
+                # Keep the end of the buffer in case the boundary spans two reads
+                kept = buffer[-BOUNDARY_OVERLAP:]
+                offset += len(buffer) - len(kept)
+                buffer = kept
+            else:
+                break
+    bounds.append(size)
+    return bounds
+
+
+def process_chunk(
+    chunk: tuple[str, int, int, str, str],
+) -> tuple[list[dict], dict | None, int] | None:
+    """Processes the dictionary entries in a byte range of a letter file.
+
+    The entries are sorted and written to a shard file, except the last one,
+    which is returned with the definitions of the continuation blocks before
+    the chunk's first word and the number of entries written. Returns None if
+    the file could not be read.
+    """
+    file_path, start, end, engine, shard_path = chunk
+    try:
+        texts = read_range(file_path, start, end)
+        if engine == "bs4":
+            continuations, entries = collect_entries(
+                BeautifulSoup("".join(texts), "lxml").find_all("p")
+            )
+        else:
+            continuations, entries = collect_entries(iter_paragraphs(texts))
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading file: {e}")
+        return None
 
+    if not entries:
+        return continuations, None, 0
+
+    last_entry = entries.pop()
+    entries.sort(key=get_sort_key)
+    write_shard(shard_path, entries)
+    return continuations, last_entry, len(entries)
+
+
+def read_range(file_path: str, start: int, end: int) -> Iterator[str]:
+    """Reads a byte range of a file as text in pieces."""
+    decoder = codecs.getincrementaldecoder(ENCODING)()
+    with open(file_path, "rb") as in_file:
+        in_file.seek(start)
+        remaining = end - start
+        while remaining > 0 and (block := in_file.read(min(READ_SIZE, remaining))):
+            remaining -= len(block)
+            yield decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_paragraphs(texts: Iterable[str]) -> Iterator[etree._Element]:
+    """Yields the `<p>` elements of a document in order, freeing each one after use."""
+    builder = ParagraphBuilder()
+    parser = etree.HTMLParser(target=builder, recover=True)
+
+    for text in texts:
+        if text:
+            parser.feed(text)
+            yield from builder.pop_completed()
+    parser.close()
+    yield from builder.pop_completed()
+
+
+class ParagraphBuilder:
+    """Builds `<p>` elements from parser events the way BeautifulSoup builds its tree.
+
+    Only the outermost open `<p>` and its ancestors are kept, so memory stays
+    bounded by the largest entry rather than the whole file.
+    """
+
+    def __init__(self):
+        self.stack = [etree.Element("root")]
+        self.names = ["[document]"]
+        self.open_counts = Counter()
+        self.strings = []
+        self.completed = []
+
+    def start(self, tag: str, attrib, nsmap=None) -> None:
+        self.end_data()
+        try:
+            element = etree.SubElement(self.stack[-1], tag)
+        except ValueError:
+            # Only the entry tags are looked up, so other invalid names can be replaced
+            element = etree.SubElement(self.stack[-1], "invalid")
+        self.stack.append(element)
+        self.names.append(tag)
+        self.open_counts[tag] += 1
+
+    def end(self, tag: str) -> None:
+        self.end_data()
+        # Pop up to the most recent tag with the name, if there is one
+        if not self.open_counts[tag]:
+            return
+        while True:
+            element, name = self.stack.pop(), self.names.pop()
+            self.open_counts[name] -= 1
+            if name == "p" and not self.open_counts["p"]:
+                self.completed.append(element)
+            if name == tag:
+                return
+
+    def data(self, data: str) -> None:
+        self.strings.append(data)
+
+    def comment(self, text: str) -> None:
+        self.end_data()
+        self.add_separator()
+
+    def pi(self, target: str, data: str) -> None:
+        self.end_data()
+        self.add_separator()
+
+    def doctype(self, name: str, pubid: str, system: str) -> None:
+        self.end_data()
+        self.add_separator()
+
+    def close(self) -> None:
+        self.end_data()
+        while len(self.stack) > 1:
+            self.end(self.names[-1])
+
+    def end_data(self) -> None:
+        """Adds the collected data to the current element as one string."""
+        if not self.strings:
+            return
+        text = "".join(self.strings)
+        self.strings = []
+
+        if any(self.open_counts[name] for name in STRING_CONTAINER_TAGS):
+            # Not a plain string, so leave it out of the text
+            self.add_separator()
+            return
+        if not text.strip(ASCII_SPACES) and not any(
+            self.open_counts[name] for name in PRESERVE_WHITESPACE_TAGS
+        ):
+            text = "\n" if "\n" in text else " "
+
+        parent = self.stack[-1]
+        if len(parent) and parent[-1].tail is None:
+            parent[-1].tail = text
+        elif not len(parent) and parent.text is None:
+            parent.text = text
+        else:
+            # Keep separate strings apart, as they are stripped one by one
+            self.add_separator().tail = text
+
+    def add_separator(self) -> etree._Element:
+        """Adds a node without text to split the strings around it."""
+        separator = etree.Comment()
+        self.stack[-1].append(separator)
+        return separator
+
+    def pop_completed(self) -> Iterator[etree._Element]:
+        """Yields the finished outermost `<p>` elements and the `<p>` elements nested in them."""
+        completed, self.completed = self.completed, []
+        for element in completed:
+            yield from element.iter("p")
+
+            # Drop the element and the closed elements before it
+            parent = element.getparent()
+            while (previous := element.getprevious()) is not None:
+                parent.remove(previous)
+            parent.remove(element)
+
+
+def collect_entries(entries) -> tuple[list[dict], list[dict]]:
+    """Processes `<p>` elements, attaching continuation blocks to the previous word.
+
+    The definitions of continuation blocks before the first word are returned
+    separately, as they belong to the last word of the previous chunk.
+    """
+    continuations = []
     data = []
 
     for entry in entries:
@@ -80,60 +506,72 @@ def process_letter(letter: str, dir_path: str) -> list[dict]:
             elif len(data) >= 1:
                 data[-1]["definitions"].extend(new_entry["definitions"])
 
-    return data
+            # Previous chunk's word otherwise
+            else:
+                continuations.extend(new_entry["definitions"])
+
+    return continuations, data
 
 
-def process_entry(entry: BeautifulSoup) -> dict:
+def process_entry(entry: BeautifulSoup | etree._Element) -> dict:
     """Processes a dictionary entry."""
     try:
         # Find definitions
         word = None
-        if word_xml := entry.find("ent"):
-            word = word_xml.get_text(strip=True)
-            logger.info(f"Processing entry: {word}")
-
-        pos_xml = entry.find("pos")
-        descriptions_xml = entry.find_all("def")
-        origin_xml = entry.find("ety")
-        synonyms_xml = entry.find("syn")
-        antonyms_xml = entry.find("ant")
-        sources_xml = entry.find_all("source")
-        example_xml = entry.find("q") if entry.find("qex") else None
+        if (word_xml := find(entry, "ent")) is not None:
+            word = get_text(word_xml, strip=True)
+            logger.debug("Processing entry: %s", word)
+
+        pos_xml = find(entry, "pos")
+        descriptions_xml = find_all(entry, "def")
+        origin_xml = find(entry, "ety")
+        synonyms_xml = find(entry, "syn")
+        antonyms_xml = find(entry, "ant")
+        sources_xml = find_all(entry, "source")
+        example_xml = find(entry, "q") if find(entry, "qex") is not None else None
 
         # Convert and format definitions
-        pos = pos_xml.get_text(strip=True) if pos_xml else None
+        pos = get_text(pos_xml, strip=True) if pos_xml is not None else None
 
         descriptions = (
-            [unescape(d.get_text(strip=True)) for d in descriptions_xml]
+            [unescape(get_text(d, strip=True)) for d in descriptions_xml]
             if descriptions_xml
             else []
         )
 
-        origin = unescape(origin_xml.get_text().strip(" []")) if origin_xml else None
+        origin = (
+            unescape(get_text(origin_xml).strip(" []"))
+            if origin_xml is not None
+            else None
+        )
 
         synonyms = (
             [
                 word.strip().lower()
-                for word in synonyms_xml.get_text(strip=True)
+                for word in get_text(synonyms_xml, strip=True)
                 .replace("Syn. --", "")
                 .split(",")
             ]
-            if synonyms_xml
+            if synonyms_xml is not None
             else []
         )
 
         antonyms = (
             [
                 word.strip().lower()
-                for word in antonyms_xml.get_text(strip=True).split(";")
+                for word in get_text(antonyms_xml, strip=True).split(";")
             ]
-            if antonyms_xml
+            if antonyms_xml is not None
             else []
         )
 
-        source = sources_xml[0].get_text(strip=True) if sources_xml else ""
+        source = get_text(sources_xml[0], strip=True) if sources_xml else ""
 
-        examples = [unescape(example_xml.get_text(strip=True))] if example_xml else []
+        examples = (
+            [unescape(get_text(example_xml, strip=True))]
+            if example_xml is not None
+            else []
+        )
 
         # Save definitions
         definitions = []
@@ -161,51 +599,79 @@ def process_entry(entry: BeautifulSoup) -> dict:
         return None
 
 
+def find(entry: BeautifulSoup | etree._Element, tag: str):
+    """Finds the first descendant with a tag name in either kind of tree."""
+    if isinstance(entry, etree._Element):
+        return next(entry.iter(tag), None)
+    return entry.find(tag)
+
+
+def find_all(entry: BeautifulSoup | etree._Element, tag: str) -> list:
+    """Finds all descendants with a tag name in either kind of tree."""
+    if isinstance(entry, etree._Element):
+        return list(entry.iter(tag))
+    return entry.find_all(tag)
+
+
+def get_text(element: BeautifulSoup | etree._Element, strip: bool = False) -> str:
+    """Gets the text of an element like BeautifulSoup's `get_text` in either kind of tree."""
+    if not isinstance(element, etree._Element):
+        return element.get_text(strip=strip)
+    if strip:
+        return "".join(text for text in map(str.strip, element.itertext()) if text)
+    return "".join(element.itertext())
+
+
 def export_parsed_data(
-    parsed_data: list[dict],
+    parsed_data: ShardedEntries,
+    output_path: str | None = None,
     overwrite: bool = False,
 ) -> bool:
     """Exports parsed data to a JSON file."""
     if not parsed_data:
         logger.warning("No data to export.")
+        parsed_data.discard()
         return
 
-    # Sort entries by word (case-insensitive)
-    parsed_data.sort(key=lambda entry: entry["word"].lower())
-
-    output_dir = os.path.join(SCRIPT_DIR, "parsed")
-    os.makedirs(output_dir, exist_ok=True)
-
-    output_filename = f"dictionary_eng_eng_{len(parsed_data)}.json"
-    output_path = os.path.join(output_dir, output_filename)
-
-    if not overwrite:
-        # Append counter to duplicate file names
-        counter = 2
-        base, ext = os.path.splitext(output_path)
-        while os.path.exists(output_path):
-            output_path = f"{base}_{counter}{ext}"
-            counter += 1
-
-    json_data = {
-        "meta": {
-            "lang": "eng",
-            "definition_lang": "eng",
-            "total_entries": len(parsed_data),
-            "source_title": f"GCIDE",
-            "source_link": f"https://ibiblio.org/webster/",
-        },
-        "entries": parsed_data,
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    else:
+        output_dir = os.path.join(SCRIPT_DIR, "parsed")
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_filename = f"dictionary_eng_eng_{len(parsed_data)}.json"
+        output_path = os.path.join(output_dir, output_filename)
+
+        if not overwrite:
+            # Append counter to duplicate file names
+            counter = 2
+            base, ext = os.path.splitext(output_path)
+            while os.path.exists(output_path):
+                output_path = f"{base}_{counter}{ext}"
+                counter += 1
+
+    meta = {
+        "lang": "eng",
+        "definition_lang": "eng",
+        "total_entries": len(parsed_data),
+        "source_title": f"GCIDE",
+        "source_link": f"https://ibiblio.org/webster/",
     }
 
+    # Entries are merged from the sorted shards as they are written
+    part_path = os.path.join(parsed_data.dir_path, "export.json.part")
     try:
-        with open(output_path, "w", encoding="utf-8") as file:
-            json.dump(json_data, file, indent=2, ensure_ascii=False)
+        os.makedirs(parsed_data.dir_path, exist_ok=True)
+        with open(part_path, "w", encoding="utf-8") as file:
+            write_entries_json(file, meta, parsed_data)
+        os.replace(part_path, output_path)
         logger.info(f"Data successfully exported to:\n{output_path}")
         return True
-    except IOError as e:
+    except (IOError, ValueError) as e:
         logger.error(f"Failed to export data: {e}")
         return False
+    finally:
+        parsed_data.discard()
 
 
 if __name__ == "__main__":
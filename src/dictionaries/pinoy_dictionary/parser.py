@@ -1,14 +1,37 @@
 import argparse
-import json
 import os
 import re
 import sys
-from bs4 import BeautifulSoup
-from utils.logger import logger
+from typing import Iterable, Iterator
+from html import unescape
+from itertools import chain
+from utils.build_cache import BuildCache, add_build_cache_arguments, get_code_version
+from utils import json_stream, parallel
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
 from utils.graceful_exit import on_exit
+from utils.json_stream import JSONEntriesWriter, iter_entries_json
+from utils.parallel import add_worker_arguments, map_chunked
+from utils.progress import Progress
 
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+PARSED_META_KEYS = ("lang", "definition_lang", "source_title", "source_link")
+# Sources whose changes change the parsed output
+CODE_PATHS = (__file__, json_stream.__file__, parallel.__file__)
+
+# Markup that splits or holds no text: comments, declarations, scripts, styles and tags
+MARKUP_PATTERN = re.compile(
+    r"<!--.*?(?:-->|$)"
+    r"|<script\b[^>]*>.*?(?:</script\s*>|$)"
+    r"|<style\b[^>]*>.*?(?:</style\s*>|$)"
+    r"|<[!?][^>]*>"
+    r"|</?[a-zA-Z](?:[^>\"']|\"[^\"]*\"|'[^']*')*>",
+    re.DOTALL | re.IGNORECASE,
+)
+PARENTHESES_PATTERN = re.compile(r"\(.+?\)")
+INFLECTIONS_PATTERN = re.compile(r"^\(([^\(\)]*(?:\(.+?\))?[^\(\)]*)\)")
+POS_PATTERN = re.compile(r"^((?:(?:\d\. )?[a-z]+\.,?;? ?)+)")
+SENSE_PATTERN = re.compile(r"\d+(?:\.|\))\s*")
 
 
 def main():
@@ -22,37 +45,92 @@ def main():
         default=os.path.join(SCRIPT_DIR, "scraped", "scraped.json"),
         help="Path to the input file. Defaults to `scraped/scraped.json`)",
     )
+    argparser.add_argument(
+        "-o",
+        "--output-file",
+        help="Path to the output file, replaced if it exists. Defaults to a new file in `parsed/` named after the meta.",
+    )
+    add_worker_arguments(argparser)
+    add_build_cache_arguments(argparser)
+    add_log_arguments(argparser)
     args = argparser.parse_args()
+    configure_logging_from_args(args)
 
     input_path = args.input_file
     raw_data, meta = import_raw_data(input_path)
-    if not raw_data:
+    if not meta:
         logger.error(f"No raw data")
         sys.exit(1)
 
-    # Main data store
-    parsed_data: list[dict] = []
+    # Main data store, written to a temporary file as entries are parsed
+    parsed_data = JSONEntriesWriter(
+        os.path.join(SCRIPT_DIR, "parsed", f".parsing_{os.getpid()}.json.part"),
+        {key: meta[key] for key in PARSED_META_KEYS},
+    )
 
     # Handle graceful exit
     on_exit(
-        lambda: export_parsed_data(parsed_data, meta),
+        lambda: export_parsed_data(parsed_data, meta, args.output_file),
         message="Process interrupted. Saving processed data...",
     )
 
-    parse(raw_data, parsed_data)
+    # Parsed chunks of earlier runs on the same language
+    cache = None
+    if not args.no_build_cache:
+        cache = BuildCache(
+            os.path.join(
+                SCRIPT_DIR, "build_cache", f"{meta['lang']}_{meta['definition_lang']}"
+            ),
+            get_code_version(*CODE_PATHS),
+        )
+
+    if not parse(
+        raw_data,
+        parsed_data,
+        args.workers,
+        args.chunk_size,
+        meta.get("total_entries"),
+        cache,
+    ):
+        parsed_data.discard()
+        sys.exit(1)
+    if cache:
+        cache.evict_unused()
 
-    export_parsed_data(parsed_data, meta)
+    export_parsed_data(parsed_data, meta, args.output_file)
 
 
-def parse(raw_data: list[dict], parsed_data: list[dict]) -> bool:
-    """Parses dictionary entries."""
-    if not raw_data:
-        logger.error("No data to process.")
-        return False
+def parse(
+    raw_data: Iterable[dict],
+    parsed_data: list[dict] | JSONEntriesWriter,
+    workers: int = 1,
+    chunk_size: int | None = None,
+    total: int | None = None,
+    cache: BuildCache | None = None,
+) -> bool:
+    """Parses dictionary entries, in worker processes if more than one worker is given.
 
-    for entry in raw_data:
-        if processed_entry := process_entry(entry):
-            parsed_data.append(processed_entry)
+    Chunks of entries found in the build cache are not parsed again.
+    """
+    entries = iter(raw_data)
+    try:
+        # Streamed entries are only known to be empty once the first is read
+        first_entry = next(entries, None)
+        if first_entry is None:
+            logger.error("No data to process.")
+            return False
+
+        progress = Progress("Parsing", total)
+        for processed_entry in map_chunked(
+            process_entry, chain([first_entry], entries), workers, chunk_size, cache
+        ):
+            progress.update()
+            if processed_entry:
+                parsed_data.append(processed_entry)
+    except ValueError as e:
+        logger.error(f"Failed to read data: {e}")
+        return False
+    progress.close()
 
     logger.info(f"Parsing completed for. Total entries collected: {len(parsed_data)}")
     return True
@@ -64,28 +142,28 @@ def process_entry(entry: dict[str, str]) -> dict | None:
         word = entry.get("word")
         if not word or word.isspace():
             return None
-        full_definition = BeautifulSoup(
-            entry.get("definition", ""), "html.parser"
-        ).get_text(strip=True)
+        full_definition = get_text(entry.get("definition", ""))
         source = entry.get("source", "")
 
-        logger.info(f"Processing entry: {word}")
+        logger.debug("Processing entry: %s", word)
 
         # Remove texts in parenthesis in word (e.g. https://tagalog.pinoydictionary.com/word/abay-mga/)
-        word = re.sub(r"\(.+?\)", "", word).strip()
+        if "(" in word:
+            word = PARENTHESES_PATTERN.sub("", word)
+        word = word.strip()
         # Remove repeated words (e.g. https://tagalog.pinoydictionary.com/word/adisyon-adisyon/)
         if "," in word:
             word = word.split(",")[0].strip()
 
         # Removes word that is prefixed in definition (e.g. https://tagalog.pinoydictionary.com/word/aalug-alog/)
-        full_definition = re.sub(f"^{word}", "", full_definition).lstrip(" .,;:!?")
+        if full_definition.startswith(word):
+            full_definition = full_definition[len(word) :]
+        full_definition = full_definition.lstrip(" .,;:!?")
 
         # Extract inflections (at the start of the definition and enclosed within parentheses)
         # (e.g. https://tagalog.pinoydictionary.com/word/abain/)
         inflections = []
-        if inflection_match := re.match(
-            r"^\(([^\(\)]*(?:\(.+?\))?[^\(\)]*)\)", full_definition
-        ):
+        if inflection_match := INFLECTIONS_PATTERN.match(full_definition):
             inflections_str = inflection_match.group(1).replace(".", ",").strip()
             inflections = [inf.strip() for inf in inflections_str.split(",")]
 
@@ -97,7 +175,7 @@ def process_entry(entry: dict[str, str]) -> dict | None:
         # Extract parts of speech (at the start of the definition with a pattern of <pos>., <pos>.; <pos>.)
         # (e.g. https://tagalog.pinoydictionary.com/word/abahin/)
         pos = None
-        if pos_match := re.match(r"^((?:(?:\d\. )?[a-z]+\.,?;? ?)+)", full_definition):
+        if pos_match := POS_PATTERN.match(full_definition):
             pos = pos_match.group(1).strip()
             full_definition = full_definition[len(pos) :].strip()
 
@@ -115,7 +193,7 @@ def process_entry(entry: dict[str, str]) -> dict | None:
                     }.items()
                     if value  # Include only if the value is non-empty
                 }
-                for description in re.split(r"\d+(?:\.|\))\s*", full_definition)
+                for description in SENSE_PATTERN.split(full_definition)
                 if description  # Ensure the description is non-empty
             ]
             if full_definition
@@ -131,68 +209,62 @@ def process_entry(entry: dict[str, str]) -> dict | None:
         return None
 
 
-def import_raw_data(file_path: str) -> tuple[list[dict], dict]:
-    """Loads data from a file."""
+def get_text(html: str) -> str:
+    """Gets the text of an HTML fragment like BeautifulSoup's `get_text(strip=True)`.
+
+    Every text node between tags is unescaped and stripped, then joined.
+    """
+    texts = (unescape(text).strip() for text in MARKUP_PATTERN.split(html) if text)
+    return "".join(text for text in texts if text)
+
+
+def import_raw_data(file_path: str) -> tuple[Iterator[dict], dict]:
+    """Opens a file, returning a lazy iterator over its entries and its meta."""
     logger.info(f"Loading data from {file_path}...")
 
     if not os.path.exists(file_path):
         logger.error(f"File not found: {file_path}")
-        return [], {}
+        return iter(()), {}
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-            meta = data["meta"]
-            entries = data["entries"]
-        logger.info(f"Successfully loaded {len(entries)} entries from {file_path}")
+        meta, entries = iter_entries_json(file_path)
+        logger.info(f"Successfully loaded meta from {file_path}. Streaming entries...")
         return entries, meta
     except Exception as e:
         logger.error(f"Failed to load data: {e}")
-        return [], {}
+        return iter(()), {}
 
 
 def export_parsed_data(
-    parsed_data: list[dict],
+    parsed_data: JSONEntriesWriter,
     meta: dict,
+    output_path: str | None = None,
     overwrite: bool = False,
 ) -> bool:
     """Exports processed data to a file."""
     if not parsed_data:
         logger.warning("No data to export.")
+        parsed_data.discard()
         return False
 
-    output_dir = os.path.join(SCRIPT_DIR, "parsed")
-    os.makedirs(output_dir, exist_ok=True)
-
-    output_filename = f"dictionary_{meta['lang']}_{meta['definition_lang']}_{meta['total_entries']}_{meta['date']}_parsed.json"
-    output_path = os.path.join(output_dir, output_filename)
-
-    if not overwrite:
-        # Append counter to duplicate file names
-        counter = 2
-        base, ext = os.path.splitext(output_path)
-        while os.path.exists(output_path):
-            output_path = f"{base}_{counter}{ext}"
-            counter += 1
-
-    json_data = {
-        "meta": {
-            "lang": meta["lang"],
-            "definition_lang": meta["definition_lang"],
-            "source_title": meta["source_title"],
-            "source_link": meta["source_link"],
-        },
-        "entries": parsed_data,
-    }
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    else:
+        output_dir = os.path.join(SCRIPT_DIR, "parsed")
+        os.makedirs(output_dir, exist_ok=True)
 
-    try:
-        with open(output_path, "w", encoding="utf-8") as file:
-            json.dump(json_data, file, indent=2, ensure_ascii=False)
-        logger.info(f"Data successfully exported to {output_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to export data: {e}")
-        return False
+        output_filename = f"dictionary_{meta['lang']}_{meta['definition_lang']}_{meta['total_entries']}_{meta['date']}_parsed.json"
+        output_path = os.path.join(output_dir, output_filename)
+
+        if not overwrite:
+            # Append counter to duplicate file names
+            counter = 2
+            base, ext = os.path.splitext(output_path)
+            while os.path.exists(output_path):
+                output_path = f"{base}_{counter}{ext}"
+                counter += 1
+
+    return parsed_data.close(output_path)
 
 
 if __name__ == "__main__":
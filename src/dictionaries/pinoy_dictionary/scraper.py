@@ -1,11 +1,35 @@
 import argparse
+import asyncio
 import bs4
 import json
 import os
+import re
 from datetime import datetime
-from utils.logger import logger
-from utils.fetch_page import fetch_page
+from time import perf_counter
+from utils.crawl_stats import (
+    add_report_arguments,
+    record_parse,
+    start_crawl,
+    start_periodic_report,
+    write_report,
+)
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
+from utils.fetch_page import fetch_page, fetch_page_async
 from utils.graceful_exit import on_exit
+from utils.http_cache import (
+    add_cache_arguments,
+    configure_cache_from_args,
+    log_cache_stats,
+)
+from utils.http_session import log_session_stats
+from utils.journal import Journal
+from utils.ndjson import NDJSONWriter
+from utils.rate_limit import (
+    add_rate_limit_arguments,
+    configure_rate_limit,
+    log_throttle_stats,
+)
+from utils.scheduler import Scheduler, add_scheduler_arguments, run_scheduled
 
 
 SUPPORTED_LANGS = {
@@ -16,7 +40,14 @@ SUPPORTED_LANGS = {
 }
 DEFINITION_LANG = "eng"
 STARTING_LETTERS = "abcdeghijklmnoprstuwxyz"
+HTML_PARSERS = ("html.parser", "lxml")
+RETRIES = 3
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+JOURNAL_DIR = os.path.join(SCRIPT_DIR, "journal")
+# Matched against the raw attribute, so the class may be one of several
+WORD_GROUP_STRAINER = bs4.SoupStrainer(class_=re.compile(r"(?:^|\s)word-group(?:\s|$)"))
+
+_html_parser = "html.parser"
 
 
 def main():
@@ -31,58 +62,140 @@ def main():
         default="tgl",
         help=f"The language to scrape (e.g., 'tgl', 'ceb'). Defaults to 'tgl'.",
     )
+    argparser.add_argument(
+        "--all-langs",
+        action="store_true",
+        help="Scrape every supported language concurrently into separate files.",
+    )
+    argparser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Scrape several letters and pages concurrently.",
+    )
+    add_scheduler_arguments(argparser)
+    argparser.add_argument(
+        "--html-parser",
+        choices=HTML_PARSERS,
+        default="html.parser",
+        help="How to parse list pages. 'lxml' only builds the entries' subtrees and is much faster. Defaults to 'html.parser'.",
+    )
+    argparser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scrape from its journal instead of starting over.",
+    )
+    argparser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write entries to a newline-delimited JSON file as they are scraped.",
+    )
+    add_rate_limit_arguments(argparser)
+    add_cache_arguments(argparser, os.path.join(SCRIPT_DIR, "cache"))
+    add_report_arguments(argparser, os.path.join(SCRIPT_DIR, "reports"))
+    add_log_arguments(argparser)
     args = argparser.parse_args()
 
-    lang = args.lang
+    langs = list(SUPPORTED_LANGS) if args.all_langs else [args.lang]
+    if args.max_per_host < 1 or args.max_total < 1:
+        argparser.error("Concurrency limits must be positive integers.")
+    if args.max_rate <= 0:
+        argparser.error("--max-rate must be positive.")
+
+    configure_logging_from_args(args)
+    configure_cache_from_args(args)
+    configure_rate_limit(args.max_rate)
+    set_html_parser(args.html_parser)
+
+    # Main data store, one per language
+    scraped_data: dict[str, list[dict] | NDJSONWriter] = {}
+    for lang in langs:
+        scraped_data[lang] = []
+        if args.stream:
+            scraped_data[lang] = NDJSONWriter(
+                os.path.join(SCRIPT_DIR, "scraped", f"dictionary_{lang}.ndjson.part")
+            )
+
+    # Record completed pages so a crashed scrape can be resumed
+    journals = {
+        lang: Journal(
+            os.path.join(JOURNAL_DIR, f"{lang}.jsonl"),
+            resume=args.resume,
+            upgrade=upgrade_journal_entries,
+        )
+        for lang in langs
+    }
 
-    # Main data store
-    scraped_data: list[dict] = []
+    # Pages of the letters still being scraped in async mode, saved on exit
+    in_flight: dict[str, dict[str, dict[int, list[dict] | None]]] = {}
 
     # Handle graceful exit
     on_exit(
-        lambda: export_scraped_data(lang, scraped_data),
+        lambda: [
+            write_report(args.report),
+            *(
+                flush_in_flight(scraped_data[lang], in_flight.get(lang))
+                for lang in langs
+            ),
+            *(export_scraped_data(lang, scraped_data[lang]) for lang in langs),
+        ],
         message="Process interrupted. Saving scraped data...",
     )
 
-    scrape(lang, scraped_data)
+    # Keep the crawl report up to date while scraping
+    start_crawl()
+    stop_report = start_periodic_report(args.report, args.report_interval)
+
+    if args.use_async or args.all_langs:
+        run_scheduled(
+            lambda scheduler: scrape_langs_async(
+                langs, scraped_data, scheduler, journals, in_flight
+            ),
+            args.max_per_host,
+            args.max_total,
+        )
+    else:
+        scrape(args.lang, scraped_data[args.lang], journals[args.lang])
+
+    stop_report.set()
+    if write_report(args.report):
+        logger.info(f"Crawl report written to {args.report}")
+
+    log_session_stats()
+    log_cache_stats()
+    log_throttle_stats()
 
-    export_scraped_data(lang, scraped_data)
+    for lang in langs:
+        exported = export_scraped_data(lang, scraped_data[lang])
+        journals[lang].close(remove=exported)
 
 
-def scrape(lang: str, scraped_data: list[dict]) -> bool:
+def scrape(lang: str, scraped_data: list[dict], journal: Journal | None = None) -> bool:
     """Scrapes dictionary entries."""
     for letter in STARTING_LETTERS:
         page_number = 1
+        last_page = 0  # Unknown until a page links to it
 
         while True:
             logger.info(
                 f"Scraping: {lang.upper()} - Letter: {letter.upper()} - Page {page_number}"
             )
 
-            # Construct url
-            base_url = f"https://{SUPPORTED_LANGS[lang].lower()}.pinoydictionary.com/list/{letter}/"
-            url = f"{base_url}{page_number}/" if page_number > 1 else base_url
-
-            # Get page
-            response = fetch_page(url)
+            entries, linked_page = scrape_page(lang, letter, page_number, journal)
 
             # If there's no page left, goto the next letter
-            if not response:
-                break
-
-            soup = bs4.BeautifulSoup(response, "html.parser")
-
-            # Scrape entries
-            entries: bs4.ResultSet[bs4.element.Tag] = soup.find_all(class_="word-group")
-            if not entries:
+            if entries is None:
                 logger.info(
                     f"No entries found on page {page_number}. Moving to next letter."
                 )
                 break
 
-            for entry in entries:
-                if processed_entry := process_entry(entry):
-                    scraped_data.append(processed_entry)
+            scraped_data.extend(entries)
+
+            # Stop at the last page of the pagination instead of requesting past it
+            last_page = max(last_page, linked_page)
+            if last_page and page_number >= last_page:
+                break
 
             page_number += 1
 
@@ -90,6 +203,270 @@ def scrape(lang: str, scraped_data: list[dict]) -> bool:
     return True
 
 
+async def scrape_langs_async(
+    langs: list[str],
+    scraped_data: dict[str, list[dict]],
+    scheduler: Scheduler,
+    journals: dict[str, Journal] | None = None,
+    in_flight: dict[str, dict[str, dict[int, list[dict] | None]]] | None = None,
+) -> bool:
+    """Scrapes several languages at once, interleaving their requests."""
+    journals = journals or {}
+    if in_flight is None:
+        in_flight = {}
+
+    await asyncio.gather(
+        *(
+            scrape_async(
+                lang,
+                scraped_data[lang],
+                scheduler,
+                journals.get(lang),
+                in_flight.setdefault(lang, {}),
+            )
+            for lang in langs
+        )
+    )
+
+    return True
+
+
+async def scrape_async(
+    lang: str,
+    scraped_data: list[dict],
+    scheduler: Scheduler,
+    journal: Journal | None = None,
+    in_flight: dict[str, dict[int, list[dict] | None]] | None = None,
+) -> bool:
+    """Scrapes dictionary entries concurrently, keeping the sequential entry order.
+
+    The pages of letters not collected yet are kept in `in_flight`, so an
+    interrupted scrape can still save them.
+    """
+    if in_flight is None:
+        in_flight = {}
+    tasks = []
+    for letter in STARTING_LETTERS:
+        in_flight[letter] = {}
+        tasks.append(
+            asyncio.create_task(
+                scrape_letter_async(lang, letter, scheduler, journal, in_flight[letter])
+            )
+        )
+
+    # Collect letters in order so the output matches the sequential scrape
+    for letter, task in zip(STARTING_LETTERS, tasks):
+        scraped_data.extend(await task)
+        del in_flight[letter]
+
+    logger.info(
+        f"Scraping completed for {lang.upper()}. Total entries collected: {len(scraped_data)}"
+    )
+    return True
+
+
+async def scrape_letter_async(
+    lang: str,
+    letter: str,
+    scheduler: Scheduler,
+    journal: Journal | None = None,
+    pages: dict[int, list[dict] | None] | None = None,
+) -> list[dict]:
+    """Scrapes the first page of a letter, then all of its remaining pages at once.
+
+    Pages are added to `pages` as soon as they are scraped.
+    """
+    if pages is None:
+        pages = {}
+    entries, last_page = await scrape_page_async(lang, letter, 1, scheduler, journal)
+    pages[1] = entries
+
+    async def scrape_into_pages(number: int) -> int:
+        pages[number], linked_page = await scrape_page_async(
+            lang, letter, number, scheduler, journal
+        )
+        return linked_page
+
+    if entries is not None:
+        if not last_page:
+            last_page = await probe_last_page_async(
+                lang, letter, scheduler, journal, pages
+            )
+
+        # Pagination may only link nearby pages, so repeat until no page links further
+        while page_numbers := [
+            number for number in range(2, last_page + 1) if number not in pages
+        ]:
+            linked_pages = await asyncio.gather(
+                *(scrape_into_pages(number) for number in page_numbers)
+            )
+            last_page = max(last_page, *linked_pages)
+
+    # Keep the pages before the first missing one, like the sequential scrape
+    letter_data: list[dict] = []
+    for number in range(1, max(pages) + 1):
+        logger.info(
+            f"Scraping: {lang.upper()} - Letter: {letter.upper()} - Page {number}"
+        )
+
+        if pages.get(number) is None:
+            logger.info(f"No entries found on page {number}. Moving to next letter.")
+            break
+
+        letter_data.extend(pages[number])
+
+    return letter_data
+
+
+def flush_in_flight(
+    scraped_data: list[dict] | NDJSONWriter,
+    in_flight: dict[str, dict[int, list[dict] | None]] | None,
+) -> None:
+    """Adds the pages scraped so far of letters not collected yet, in letter and page order."""
+    for pages in (in_flight or {}).values():
+        for number in sorted(pages):
+            if pages[number] is None:
+                break
+            scraped_data.extend(pages[number])
+    if in_flight:
+        in_flight.clear()
+
+
+async def probe_last_page_async(
+    lang: str,
+    letter: str,
+    scheduler: Scheduler,
+    journal: Journal | None,
+    pages: dict[int, list[dict] | None],
+) -> int:
+    """Finds the last page of a letter without pagination by exponential and binary search."""
+
+    async def exists(number: int) -> bool:
+        if number not in pages:
+            pages[number], _ = await scrape_page_async(
+                lang, letter, number, scheduler, journal
+            )
+        return pages[number] is not None
+
+    # Double the page number until a page is missing
+    low, high = 1, 2
+    while await exists(high):
+        low, high = high, high * 2
+
+    # The last page is between the last existing and the first missing page
+    while high - low > 1:
+        middle = (low + high) // 2
+        if await exists(middle):
+            low = middle
+        else:
+            high = middle
+
+    return low
+
+
+def upgrade_journal_entries(entries: list[dict] | None) -> dict:
+    """Converts a page recorded before pagination was journaled, whose last page is unknown."""
+    return {"entries": entries, "last_page": 0}
+
+
+def scrape_page(
+    lang: str, letter: str, page_number: int, journal: Journal | None = None
+) -> tuple[list[dict] | None, int]:
+    """Scrapes the entries of a list page and the last page its pagination links to.
+
+    The entries are None if there's no such page.
+    """
+    unit = (lang, letter, page_number)
+    if journal and unit in journal:
+        data = journal.restore(unit)
+        return data["entries"], data["last_page"]
+
+    response = fetch_page(get_page_url(lang, letter, page_number), RETRIES)
+
+    return process_page(unit, response, journal)
+
+
+async def scrape_page_async(
+    lang: str,
+    letter: str,
+    page_number: int,
+    scheduler: Scheduler,
+    journal: Journal | None = None,
+) -> tuple[list[dict] | None, int]:
+    """Scrapes a list page like `scrape_page` without blocking other pages."""
+    unit = (lang, letter, page_number)
+    if journal and unit in journal:
+        data = journal.restore(unit)
+        return data["entries"], data["last_page"]
+
+    response = await fetch_page_async(
+        get_page_url(lang, letter, page_number), RETRIES, scheduler
+    )
+
+    return process_page(unit, response, journal)
+
+
+def process_page(
+    unit: tuple, response: bytes | None, journal: Journal | None = None
+) -> tuple[list[dict] | None, int]:
+    """Extracts the entries and pagination of a fetched page and records them in the journal."""
+    # Failed fetches are not recorded so that a resumed scrape retries them
+    if not response:
+        return None, 0
+
+    started = perf_counter()
+    entries = extract_entries(response)
+    last_page = get_last_linked_page(response, unit[1])
+    record_parse(perf_counter() - started)
+    if journal:
+        journal.record(unit, {"entries": entries, "last_page": last_page})
+
+    return entries, last_page
+
+
+def get_last_linked_page(response: bytes, letter: str) -> int:
+    """Gets the highest page of a letter linked from a page, or 0 if there's none."""
+    pattern = re.compile(rf"/list/{re.escape(letter)}/(\d+)/".encode())
+    return max((int(number) for number in pattern.findall(response)), default=0)
+
+
+def get_page_url(lang: str, letter: str, page_number: int) -> str:
+    """Constructs the url of a list page."""
+    base_url = (
+        f"https://{SUPPORTED_LANGS[lang].lower()}.pinoydictionary.com/list/{letter}/"
+    )
+    return f"{base_url}{page_number}/" if page_number > 1 else base_url
+
+
+def set_html_parser(html_parser: str) -> None:
+    """Sets how list pages are parsed."""
+    global _html_parser
+
+    if html_parser not in HTML_PARSERS:
+        raise ValueError(f"Unsupported HTML parser: {html_parser}")
+
+    _html_parser = html_parser
+
+
+def extract_entries(response: bytes) -> list[dict] | None:
+    """Extracts the dictionary entries of a list page, or None if it has none."""
+    if _html_parser == "lxml":
+        # Only build the entries' subtrees instead of the whole page
+        soup = bs4.BeautifulSoup(response, "lxml", parse_only=WORD_GROUP_STRAINER)
+    else:
+        soup = bs4.BeautifulSoup(response, "html.parser")
+
+    entries: bs4.ResultSet[bs4.element.Tag] = soup.find_all(class_="word-group")
+    if not entries:
+        return None
+
+    return [
+        processed_entry
+        for entry in entries
+        if (processed_entry := process_entry(entry))
+    ]
+
+
 def process_entry(entry: bs4.element.Tag) -> dict | None:
     """Processes a dictionary entry."""
     try:
@@ -100,7 +477,7 @@ def process_entry(entry: bs4.element.Tag) -> dict | None:
         definition = str(definition_element)
         source_url = word_element.get("href")
 
-        logger.info(f"Processing entry: {word}")
+        logger.debug("Processing entry: %s", word)
 
         return {
             "word": word,
@@ -116,11 +493,13 @@ def process_entry(entry: bs4.element.Tag) -> dict | None:
 
 
 def export_scraped_data(
-    lang: str, scraped_data: list[dict], overwrite: bool = False
+    lang: str, scraped_data: list[dict] | NDJSONWriter, overwrite: bool = False
 ) -> bool:
     """Exports scraped data to a file."""
     if not scraped_data:
         logger.warning("No data to export.")
+        if isinstance(scraped_data, NDJSONWriter):
+            scraped_data.discard()
         return False
 
     current_date = datetime.now().strftime("%Y-%m-%d")
@@ -128,9 +507,8 @@ def export_scraped_data(
     output_dir = os.path.join(SCRIPT_DIR, "scraped")
     os.makedirs(output_dir, exist_ok=True)
 
-    output_filename = (
-        f"dictionary_{lang}_{DEFINITION_LANG}_{len(scraped_data)}_{current_date}.json"
-    )
+    output_ext = "ndjson" if isinstance(scraped_data, NDJSONWriter) else "json"
+    output_filename = f"dictionary_{lang}_{DEFINITION_LANG}_{len(scraped_data)}_{current_date}.{output_ext}"
     output_path = os.path.join(output_dir, output_filename)
 
     if not overwrite:
@@ -141,18 +519,21 @@ def export_scraped_data(
             output_path = f"{base}_{counter}{ext}"
             counter += 1
 
-    json_data = {
-        "meta": {
-            "lang": lang,
-            "definition_lang": DEFINITION_LANG,
-            "date": current_date,
-            "total_entries": len(scraped_data),
-            "source_title": f"{SUPPORTED_LANGS[lang]} Pinoy Dictionary",
-            "source_link": f"https://{SUPPORTED_LANGS[lang].lower()}.pinoydictionary.com",
-        },
-        "entries": scraped_data,
+    meta = {
+        "lang": lang,
+        "definition_lang": DEFINITION_LANG,
+        "date": current_date,
+        "total_entries": len(scraped_data),
+        "source_title": f"{SUPPORTED_LANGS[lang]} Pinoy Dictionary",
+        "source_link": f"https://{SUPPORTED_LANGS[lang].lower()}.pinoydictionary.com",
     }
 
+    # Streamed entries are already on disk
+    if isinstance(scraped_data, NDJSONWriter):
+        return scraped_data.close(output_path, meta)
+
+    json_data = {"meta": meta, "entries": scraped_data}
+
     try:
         with open(output_path, "w", encoding="utf-8") as file:
             json.dump(json_data, file, indent=2, ensure_ascii=False)
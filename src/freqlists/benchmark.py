@@ -0,0 +1,139 @@
+import argparse
+import csv
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+from freqlists.generate_freqlists import apply_existing_freqlists
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
+from utils.parallel import add_worker_arguments, get_workers
+
+
+LANG = "tgl"
+# Share of Leipzig tokens with quotes, like `"` or `"aba`
+QUOTE_RATE = 0.01
+RANGE_SIZE = 1 << 22
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Time counting a synthetic Leipzig frequency list serially and in parallel."
+    )
+    argparser.add_argument(
+        "--lines",
+        type=int,
+        default=2_000_000,
+        help="Lines of the synthetic Leipzig file. Defaults to 2000000.",
+    )
+    argparser.add_argument(
+        "--words",
+        type=int,
+        default=50_000,
+        help="Known words of the synthetic word list. Defaults to 50000.",
+    )
+    argparser.add_argument(
+        "--range-size",
+        type=int,
+        default=RANGE_SIZE,
+        help=f"Bytes counted by a worker at a time. Defaults to {RANGE_SIZE}, smaller than in generate_freqlists so the synthetic file is split.",
+    )
+    argparser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs of each method, of which the fastest is reported. Defaults to 3.",
+    )
+    argparser.add_argument(
+        "--seed", type=int, default=0, help="Random seed of the synthetic data."
+    )
+    add_worker_arguments(argparser, default_workers=0, chunk_unit=None)
+    add_log_arguments(argparser)
+    args = argparser.parse_args()
+    configure_logging_from_args(args)
+
+    with tempfile.TemporaryDirectory() as dir:
+        source_dir = Path(dir)
+        words = write_leipzig_file(
+            source_dir / f"{LANG}_benchmark.tsv", args.lines, args.words, args.seed
+        )
+        size = (source_dir / f"{LANG}_benchmark.tsv").stat().st_size
+        logger.info(f"Counting {args.lines} lines ({size / (1 << 20):.1f} MiB).")
+
+        serial_seconds, serial_counts = time_best(
+            lambda: count_serial(source_dir / f"{LANG}_benchmark.tsv", words),
+            args.repeat,
+        )
+        parallel_seconds, parallel_counts = time_best(
+            lambda: count_parallel(source_dir, words, args.workers, args.range_size),
+            args.repeat,
+        )
+
+    logger.info(f"Serial csv reader: {serial_seconds:.3f}s")
+    logger.info(
+        f"Parallel ranges ({get_workers(args.workers)} workers): {parallel_seconds:.3f}s, {serial_seconds / parallel_seconds:.2f}x"
+    )
+    # The csv reader treats quotes as quoting, so words next to them may differ
+    differing = sum(
+        serial_counts.get(word) != parallel_counts.get(word) for word in words
+    )
+    logger.info(f"Words counted differently by the csv reader: {differing}")
+
+
+def write_leipzig_file(path: Path, lines: int, words: int, seed: int) -> list[str]:
+    """Write a synthetic Leipzig file of `id<TAB>word<TAB>freq` lines.
+
+    Returns the known words, which are part of the file's words.
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(max(lines // 4, words))
+    ]
+    with path.open("w", encoding="utf-8", newline="\n") as file:
+        for number in range(1, lines + 1):
+            word = rng.choice(vocabulary)
+            if rng.random() < QUOTE_RATE:
+                word = rng.choice(['"', f'"{word}', f'{word}"'])
+            file.write(f"{number}\t{word}\t{rng.randint(1, 100_000)}\n")
+    return rng.sample(vocabulary, words)
+
+
+def time_best(run, repeat: int) -> tuple[float, dict[str, int]]:
+    """Time a run several times, returning the fastest time and the last result."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def count_serial(path: Path, words: list[str]) -> dict[str, int]:
+    """Count a Leipzig file with one csv reader, as before byte ranges were counted."""
+    freq_list = dict.fromkeys(words, 0)
+    with path.open("r", encoding="utf-8") as file:
+        for row in csv.reader(file, delimiter="\t"):
+            if len(row) < 2:
+                continue
+            word = row[1].lower()
+            try:
+                freq = int(row[-1])
+            except ValueError:
+                continue
+            if word in freq_list:
+                freq_list[word] += freq
+    return freq_list
+
+
+def count_parallel(
+    source_dir: Path, words: list[str], workers: int, range_size: int
+) -> dict[str, int]:
+    """Count a Leipzig file over byte ranges in worker processes."""
+    freq_lists = {LANG: dict.fromkeys(words, 0)}
+    apply_existing_freqlists(freq_lists, workers, source_dir, range_size)
+    return freq_lists[LANG]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,87 @@
+import argparse
 import csv
+import heapq
+import io
+import struct
 import sys
+from array import array
+from collections import Counter
 from pathlib import Path
-from utils.logger import logger
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
 from utils.graceful_exit import on_exit
+from utils.parallel import add_worker_arguments, map_chunked
+from utils.progress import Progress
 
 csv.field_size_limit(sys.maxsize)
 
 SCRIPT_DIR = Path(__file__).resolve().parent
+LEIPZIG_DIR = SCRIPT_DIR / "downloaded_data" / "leipzig"
+# Bytes of a Leipzig file counted by a worker at a time
+RANGE_SIZE = 1 << 26
+# Binary frequency lists: a header, the words joined by newlines, then the frequencies
+# as little-endian 64-bit integers, all in descending order of frequency
+BINARY_MAGIC = b"KFRQ"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sIQQ")
+FORMATS = ("csv", "binary")
+
+# Words of each language counted by the worker, set once by `set_known_words`
+_known_words: dict[str, frozenset[str]] = {}
 
 
 def main():
+    argparser = argparse.ArgumentParser(
+        description="Generate frequency lists from parsed word lists and Leipzig corpora."
+    )
+    add_worker_arguments(argparser, default_workers=0, chunk_unit=None)
+    argparser.add_argument(
+        "--top-k",
+        type=positive_int,
+        help="Export only the most frequent words of each language. Defaults to all words.",
+    )
+    argparser.add_argument(
+        "--min-freq",
+        type=positive_int,
+        help="Export only the words with at least this frequency. Defaults to all words.",
+    )
+    argparser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=FORMATS,
+        default="csv",
+        help="Output format: `csv` writes `word,freq` rows and `binary` writes a compact file loaded by `load_freq_list`. Defaults to csv.",
+    )
+    add_log_arguments(argparser)
+    args = argparser.parse_args()
+    configure_logging_from_args(args)
+
     wordlists_dir = SCRIPT_DIR.parent / "wordlists" / "parsed"
     freq_lists: dict[str, dict[str, int]] = {}
 
     on_exit(
-        lambda: export_freq_lists(freq_lists),
+        lambda: export_freq_lists(
+            freq_lists, args.top_k, args.min_freq, args.output_format
+        ),
         message="Process interrupted. Saving frequency lists...",
     )
 
-    generate_freq_lists(wordlists_dir, freq_lists)
-    export_freq_lists(freq_lists)
+    generate_freq_lists(wordlists_dir, freq_lists, args.workers)
+    export_freq_lists(freq_lists, args.top_k, args.min_freq, args.output_format)
+
+
+def positive_int(value: str) -> int:
+    """Parse a command line value as an integer greater than zero."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {number}")
+    return number
 
 
 def generate_freq_lists(
-    wordlists_dir: Path, freq_lists: dict[str, dict[str, int]]
+    wordlists_dir: Path, freq_lists: dict[str, dict[str, int]], workers: int = 0
 ) -> bool:
     """Generate frequency lists from parsed word lists and existing frequency lists."""
     for file_path in wordlists_dir.glob("*.txt"):
@@ -38,50 +96,119 @@ def generate_freq_lists(
 
         logger.info(f"Processing '{lang}' word list: {file_path}")
 
-        freq_lists.setdefault(lang, {})
+        freq_list = freq_lists.setdefault(lang, {})
 
         with file_path.open("r", encoding="utf-8") as file:
-            for line in file:
-                if word := line.strip().lower():
-                    freq_lists[lang][word] = freq_lists[lang].get(word, 0) + 1
+            counts = Counter(word for line in file if (word := line.strip().lower()))
+        for word, count in counts.items():
+            freq_list[word] = freq_list.get(word, 0) + count
 
-        apply_existing_freqlist(freq_lists, lang)
+    apply_existing_freqlists(freq_lists, workers)
 
     logger.info(f"Generated {len(freq_lists)} frequency lists.")
     return True
 
 
-def apply_existing_freqlist(freq_lists: dict[str, dict[str, int]], lang: str) -> bool:
-    """Apply existing frequency list data from the Leipzig corpus."""
-    dir = SCRIPT_DIR / "downloaded_data" / "leipzig"
+def apply_existing_freqlists(
+    freq_lists: dict[str, dict[str, int]],
+    workers: int = 0,
+    source_dir: Path = LEIPZIG_DIR,
+    range_size: int = RANGE_SIZE,
+) -> None:
+    """Apply the Leipzig frequency lists of all languages, counting byte ranges in parallel."""
+    tasks = []
+    # The known words are sent once to each worker rather than with every range
+    words = {}
+    for lang in freq_lists:
+        source_file = find_existing_freqlist(lang, source_dir)
+        if source_file is None:
+            continue
+
+        logger.info(f"Applying existing '{lang}' frequency list: {source_file}.")
+        words[lang] = frozenset(freq_lists[lang])
+        tasks.extend(
+            (lang, str(source_file), start, end)
+            for start, end in split_lines(source_file, range_size)
+        )
+
+    progress = Progress("Counting", len(tasks), unit="ranges")
+    for lang, counts in map_chunked(
+        count_range,
+        tasks,
+        workers,
+        chunk_size=1,
+        initializer=set_known_words,
+        initargs=(words,),
+    ):
+        freq_list = freq_lists[lang]
+        for word, freq in counts.items():
+            freq_list[word] += freq
+        progress.update()
+    progress.close()
+
 
-    source_file = next(dir.glob(f"{lang}_*"), None)
+def find_existing_freqlist(lang: str, source_dir: Path = LEIPZIG_DIR) -> Path | None:
+    """Find the Leipzig frequency list of a language."""
+    source_file = next(source_dir.glob(f"{lang}_*"), None)
     if source_file is None:
         logger.warning(f"No frequency list source file found for {lang}.")
-        return False
+    return source_file
 
-    logger.info(f"Applying existing '{lang}' frequency list: {source_file}.")
 
-    with source_file.open("r", encoding="utf-8") as file:
-        reader = csv.reader(file, delimiter="\t")
-        for row in reader:
-            if len(row) < 2:
-                continue
+def split_lines(file_path: Path, range_size: int = RANGE_SIZE) -> list[tuple[int, int]]:
+    """Split a file into byte ranges of about a range size that end at line ends."""
+    size = file_path.stat().st_size
+    ranges = []
+    with file_path.open("rb") as file:
+        start = 0
+        while start + range_size < size:
+            file.seek(start + range_size)
+            file.readline()
+            end = file.tell()
+            ranges.append((start, end))
+            start = end
+    if start < size or not ranges:
+        ranges.append((start, size))
+    return ranges
+
+
+def set_known_words(words: dict[str, frozenset[str]]) -> None:
+    """Set the words of each language whose frequencies are counted by `count_range`."""
+    global _known_words
+    _known_words = words
+
+
+def count_range(task: tuple[str, str, int, int]) -> tuple[str, dict[str, int]]:
+    """Sum the frequencies of the known words in a byte range of a Leipzig file.
 
-            word = row[1].lower()
+    Leipzig files are tab-separated without quoting, so quotes are part of the words.
+    """
+    lang, file_path, start, end = task
+    words = _known_words[lang]
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8")
+
+    counts = {}
+    for line in io.StringIO(text, newline=None):
+        row = line.split("\t")
+        # Only the frequencies of known words are parsed
+        if len(row) > 1 and (word := row[1].lower()) in words:
             try:
-                freq = int(row[-1])
+                counts[word] = counts.get(word, 0) + int(row[-1])
             except ValueError:
                 continue
 
-            if word in freq_lists[lang]:
-                freq_lists[lang][word] = freq_lists[lang].get(word, 0) + freq
-
-    return True
+    return lang, counts
 
 
-def export_freq_lists(freq_lists: dict[str, dict[str, int]]) -> bool:
-    """Export frequency lists to CSV files."""
+def export_freq_lists(
+    freq_lists: dict[str, dict[str, int]],
+    top_k: int | None = None,
+    min_freq: int | None = None,
+    output_format: str = "csv",
+) -> bool:
+    """Export frequency lists to CSV or binary files, most frequent words first."""
     if not freq_lists:
         logger.warning("No word lists to export.")
         return False
@@ -90,16 +217,74 @@ def export_freq_lists(freq_lists: dict[str, dict[str, int]]) -> bool:
     output_dir.mkdir(exist_ok=True)
 
     for lang, words in freq_lists.items():
+        sorted_words = select_words(words, top_k, min_freq)
+        if output_format == "binary":
+            write_freq_list_binary(output_dir / f"freqlist_{lang}.bin", sorted_words)
+            continue
+
         output_path = output_dir / f"freqlist_{lang}.csv"
         with output_path.open("w", newline="") as output_file:
             writer = csv.writer(output_file)
-            sorted_words = sorted(words.items(), key=lambda item: item[1], reverse=True)
-            for word, freq in sorted_words:
-                writer.writerow([word, freq])
+            writer.writerows(sorted_words)
 
     logger.info(f"Frequency lists exported to {output_dir}.")
     return True
 
 
+def select_words(
+    words: dict[str, int], top_k: int | None = None, min_freq: int | None = None
+) -> list[tuple[str, int]]:
+    """Select the words of a frequency list in descending order of frequency.
+
+    Words with equal frequencies keep their order in the list. The top k are
+    selected with a heap instead of sorting all words.
+    """
+    items = words.items()
+    if min_freq is not None:
+        items = [item for item in items if item[1] >= min_freq]
+    if top_k is not None and top_k < len(items):
+        return heapq.nlargest(top_k, items, key=lambda item: item[1])
+    return sorted(items, key=lambda item: item[1], reverse=True)
+
+
+def write_freq_list_binary(path: Path, sorted_words: list[tuple[str, int]]) -> None:
+    """Write a frequency list as a header, the newline-joined words and the packed frequencies."""
+    words = "\n".join(word for word, _ in sorted_words).encode("utf-8")
+    freqs = array("q", (freq for _, freq in sorted_words))
+    if sys.byteorder == "big":
+        freqs.byteswap()
+
+    with path.open("wb") as file:
+        file.write(
+            BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(freqs), len(words))
+        )
+        file.write(words)
+        file.write(freqs.tobytes())
+
+
+def load_freq_list(path: Path) -> tuple[list[str], array]:
+    """Load a binary frequency list with one read.
+
+    Returns the words in descending order of frequency and their frequencies.
+    """
+    data = Path(path).read_bytes()
+    magic, version, count, words_size = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"Not a version {BINARY_VERSION} binary frequency list")
+
+    start = BINARY_HEADER.size
+    words = (
+        data[start : start + words_size].decode("utf-8").split("\n") if count else []
+    )
+    freqs = array("q")
+    freqs.frombytes(data[start + words_size :])
+    if sys.byteorder == "big":
+        freqs.byteswap()
+    if len(words) != count or len(freqs) != count:
+        raise ValueError("Truncated binary frequency list")
+
+    return words, freqs
+
+
 if __name__ == "__main__":
     main()
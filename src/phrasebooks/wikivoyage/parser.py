@@ -1,13 +1,22 @@
 import argparse
-import json
 import os
 import sys
+from itertools import chain
+from typing import Iterable, Iterator
 from bs4 import BeautifulSoup
-from utils.logger import logger
+from utils.build_cache import BuildCache, add_build_cache_arguments, get_code_version
+from utils import json_stream, parallel
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
 from utils.graceful_exit import on_exit
+from utils.json_stream import JSONEntriesWriter, iter_entries_json
+from utils.parallel import add_worker_arguments, map_chunked
+from utils.progress import Progress
 
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+PARSED_META_KEYS = ("lang", "translation_lang", "source_title", "source_link")
+# Sources whose changes change the parsed output
+CODE_PATHS = (__file__, json_stream.__file__, parallel.__file__)
 
 
 def main():
@@ -21,37 +30,92 @@ def main():
         default=os.path.join(SCRIPT_DIR, "scraped", "scraped.json"),
         help="Path to the input JSON file. Defaults to `scraped/scraped.json`)",
     )
+    argparser.add_argument(
+        "-o",
+        "--output-file",
+        help="Path to the output file, replaced if it exists. Defaults to a new file in `parsed/` named after the meta.",
+    )
+    add_worker_arguments(argparser)
+    add_build_cache_arguments(argparser)
+    add_log_arguments(argparser)
     args = argparser.parse_args()
+    configure_logging_from_args(args)
 
     input_path = args.input_file
     raw_data, meta = import_raw_data(input_path)
-    if not raw_data:
+    if not meta:
         logger.error(f"No raw data")
         sys.exit(1)
 
-    # Main data store
-    parsed_data: list[dict] = []
+    # Main data store, written to a temporary file as entries are parsed
+    parsed_data = JSONEntriesWriter(
+        os.path.join(SCRIPT_DIR, "parsed", f".parsing_{os.getpid()}.json.part"),
+        {key: meta[key] for key in PARSED_META_KEYS},
+    )
 
     # Handle graceful exit
     on_exit(
-        lambda: export_parsed_data(parsed_data, meta),
+        lambda: export_parsed_data(parsed_data, meta, args.output_file),
         message="Process interrupted. Saving processed data...",
     )
 
-    parse(raw_data, parsed_data)
+    # Parsed chunks of earlier runs on the same language
+    cache = None
+    if not args.no_build_cache:
+        cache = BuildCache(
+            os.path.join(
+                SCRIPT_DIR, "build_cache", f"{meta['lang']}_{meta['translation_lang']}"
+            ),
+            get_code_version(*CODE_PATHS),
+        )
 
-    export_parsed_data(parsed_data, meta)
+    if not parse(
+        raw_data,
+        parsed_data,
+        args.workers,
+        args.chunk_size,
+        meta.get("total_entries"),
+        cache,
+    ):
+        parsed_data.discard()
+        sys.exit(1)
+    if cache:
+        cache.evict_unused()
 
+    export_parsed_data(parsed_data, meta, args.output_file)
 
-def parse(raw_data: list[dict], parsed_data: list[dict]) -> bool:
-    """Parses phrasebook entries."""
-    if not raw_data:
-        logger.error("No data to process.")
-        return False
 
-    for entry in raw_data:
-        if processed_entry := process_entry(entry):
-            parsed_data.append(processed_entry)
+def parse(
+    raw_data: Iterable[dict],
+    parsed_data: list[dict] | JSONEntriesWriter,
+    workers: int = 1,
+    chunk_size: int | None = None,
+    total: int | None = None,
+    cache: BuildCache | None = None,
+) -> bool:
+    """Parses phrasebook entries, in worker processes if more than one worker is given.
+
+    Chunks of entries found in the build cache are not parsed again.
+    """
+    entries = iter(raw_data)
+    try:
+        # Streamed entries are only known to be empty once the first is read
+        first_entry = next(entries, None)
+        if first_entry is None:
+            logger.error("No data to process.")
+            return False
+
+        progress = Progress("Parsing", total)
+        for processed_entry in map_chunked(
+            process_entry, chain([first_entry], entries), workers, chunk_size, cache
+        ):
+            progress.update()
+            if processed_entry:
+                parsed_data.append(processed_entry)
+    except ValueError as e:
+        logger.error(f"Failed to read data: {e}")
+        return False
+    progress.close()
 
     logger.info(f"Parsing completed for. Total entries collected: {len(parsed_data)}")
     return True
@@ -71,7 +135,7 @@ def process_entry(entry: dict[str, str]) -> dict | None:
         category = entry.get("category", "").lower()
         source = entry.get("source", "")
 
-        logger.info(f"Processing entry: {phrase}")
+        logger.debug("Processing entry: %s", phrase)
 
         translations = (
             [
@@ -101,68 +165,53 @@ def process_entry(entry: dict[str, str]) -> dict | None:
         return None
 
 
-def import_raw_data(file_path: str) -> tuple[list[dict], dict]:
-    """Loads data from a file."""
+def import_raw_data(file_path: str) -> tuple[Iterator[dict], dict]:
+    """Opens a file, returning a lazy iterator over its entries and its meta."""
     logger.info(f"Loading data from {file_path}...")
 
     if not os.path.exists(file_path):
         logger.error(f"File not found: {file_path}")
-        return [], {}
+        return iter(()), {}
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-            meta = data["meta"]
-            entries = data["entries"]
-        logger.info(f"Successfully loaded {len(entries)} entries from {file_path}")
+        meta, entries = iter_entries_json(file_path)
+        logger.info(f"Successfully loaded meta from {file_path}. Streaming entries...")
         return entries, meta
     except Exception as e:
         logger.error(f"Failed to load data: {e}")
-        return [], {}
+        return iter(()), {}
 
 
 def export_parsed_data(
-    parsed_data: list[dict],
+    parsed_data: JSONEntriesWriter,
     meta: dict,
+    output_path: str | None = None,
     overwrite: bool = False,
 ) -> bool:
     """Exports processed data to a file."""
     if not parsed_data:
         logger.warning("No data to export.")
+        parsed_data.discard()
         return False
 
-    output_dir = os.path.join(SCRIPT_DIR, "parsed")
-    os.makedirs(output_dir, exist_ok=True)
-
-    output_filename = f"phrases_{meta['lang']}_{meta['translation_lang']}_{meta['total_entries']}_{meta['date']}_parsed.json"
-    output_path = os.path.join(output_dir, output_filename)
-
-    if not overwrite:
-        # Append counter to duplicate file names
-        counter = 2
-        base, ext = os.path.splitext(output_path)
-        while os.path.exists(output_path):
-            output_path = f"{base}_{counter}{ext}"
-            counter += 1
-
-    json_data = {
-        "meta": {
-            "lang": meta["lang"],
-            "translation_lang": meta["translation_lang"],
-            "source_title": meta["source_title"],
-            "source_link": meta["source_link"],
-        },
-        "entries": parsed_data,
-    }
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    else:
+        output_dir = os.path.join(SCRIPT_DIR, "parsed")
+        os.makedirs(output_dir, exist_ok=True)
 
-    try:
-        with open(output_path, "w", encoding="utf-8") as file:
-            json.dump(json_data, file, indent=2, ensure_ascii=False)
-        logger.info(f"Data successfully exported to {output_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to export data: {e}")
-        return False
+        output_filename = f"phrases_{meta['lang']}_{meta['translation_lang']}_{meta['total_entries']}_{meta['date']}_parsed.json"
+        output_path = os.path.join(output_dir, output_filename)
+
+        if not overwrite:
+            # Append counter to duplicate file names
+            counter = 2
+            base, ext = os.path.splitext(output_path)
+            while os.path.exists(output_path):
+                output_path = f"{base}_{counter}{ext}"
+                counter += 1
+
+    return parsed_data.close(output_path)
 
 
 if __name__ == "__main__":
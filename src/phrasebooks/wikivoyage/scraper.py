@@ -1,11 +1,34 @@
 import argparse
+import asyncio
 import bs4
 import json
 import os
 from datetime import datetime
-from utils.logger import logger
-from utils.fetch_page import fetch_page
+from time import perf_counter
+from utils.crawl_stats import (
+    add_report_arguments,
+    record_parse,
+    start_crawl,
+    start_periodic_report,
+    write_report,
+)
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
+from utils.fetch_page import fetch_page, fetch_page_async
 from utils.graceful_exit import on_exit
+from utils.http_cache import (
+    add_cache_arguments,
+    configure_cache_from_args,
+    log_cache_stats,
+)
+from utils.http_session import log_session_stats
+from utils.journal import Journal
+from utils.ndjson import NDJSONWriter
+from utils.rate_limit import (
+    add_rate_limit_arguments,
+    configure_rate_limit,
+    log_throttle_stats,
+)
+from utils.scheduler import Scheduler, add_scheduler_arguments, run_scheduled
 
 
 SUPPORTED_LANGS = {
@@ -15,7 +38,10 @@ SUPPORTED_LANGS = {
     # "ilo": "Ilocano",
 }
 SOURCE_LANG = "eng"
+DEFAULT_MAX_PER_HOST = 2
+RETRIES = 3
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+JOURNAL_DIR = os.path.join(SCRIPT_DIR, "journal")
 
 
 def main():
@@ -30,36 +56,170 @@ def main():
         default="tgl",
         help=f"The language to scrape (e.g., 'tgl', 'ceb'). Defaults to 'tgl'.",
     )
+    argparser.add_argument(
+        "--all-langs",
+        action="store_true",
+        help="Scrape every supported language concurrently into separate files.",
+    )
+    add_scheduler_arguments(argparser, max_per_host=DEFAULT_MAX_PER_HOST)
+    argparser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scrape from its journal instead of starting over.",
+    )
+    argparser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write entries to a newline-delimited JSON file as they are scraped.",
+    )
+    add_rate_limit_arguments(argparser)
+    add_cache_arguments(argparser, os.path.join(SCRIPT_DIR, "cache"))
+    add_report_arguments(argparser, os.path.join(SCRIPT_DIR, "reports"))
+    add_log_arguments(argparser)
     args = argparser.parse_args()
 
-    lang = args.lang
-
-    # Main data store
-    scraped_data: list[dict] = []
+    langs = list(SUPPORTED_LANGS) if args.all_langs else [args.lang]
+    if args.max_per_host < 1 or args.max_total < 1:
+        argparser.error("Concurrency limits must be positive integers.")
+    if args.max_rate <= 0:
+        argparser.error("--max-rate must be positive.")
+
+    configure_logging_from_args(args)
+    configure_cache_from_args(args)
+    configure_rate_limit(args.max_rate)
+
+    # Main data store, one per language
+    scraped_data: dict[str, list[dict] | NDJSONWriter] = {}
+    for lang in langs:
+        scraped_data[lang] = []
+        if args.stream:
+            scraped_data[lang] = NDJSONWriter(
+                os.path.join(SCRIPT_DIR, "scraped", f"phrasebook_{lang}.ndjson.part")
+            )
+
+    # Record completed pages so a crashed scrape can be resumed
+    journals = {
+        # Older records hold the same entries
+        lang: Journal(
+            os.path.join(JOURNAL_DIR, f"{lang}.jsonl"),
+            resume=args.resume,
+            upgrade=lambda entries: entries,
+        )
+        for lang in langs
+    }
 
     # Handle graceful exit
     on_exit(
-        lambda: export_scraped_data(lang, scraped_data),
+        lambda: [
+            write_report(args.report),
+            *(export_scraped_data(lang, scraped_data[lang]) for lang in langs),
+        ],
         message="Process interrupted. Saving scraped data...",
     )
 
-    scrape(lang, scraped_data)
+    # Keep the crawl report up to date while scraping
+    start_crawl()
+    stop_report = start_periodic_report(args.report, args.report_interval)
+
+    if args.all_langs:
+        run_scheduled(
+            lambda scheduler: scrape_langs_async(
+                langs, scraped_data, scheduler, journals
+            ),
+            args.max_per_host,
+            args.max_total,
+        )
+    else:
+        scrape(args.lang, scraped_data[args.lang], journals[args.lang])
+
+    stop_report.set()
+    if write_report(args.report):
+        logger.info(f"Crawl report written to {args.report}")
+
+    log_session_stats()
+    log_cache_stats()
+    log_throttle_stats()
 
-    export_scraped_data(lang, scraped_data)
+    for lang in langs:
+        exported = export_scraped_data(lang, scraped_data[lang])
+        journals[lang].close(remove=exported)
 
 
-def scrape(lang: str, scraped_data: list) -> bool:
+def scrape(lang: str, scraped_data: list, journal: Journal | None = None) -> bool:
     """Scrapes phrasebook entries."""
-    # Construct url
-    url = f"https://en.wikivoyage.org/wiki/{SUPPORTED_LANGS[lang].capitalize()}_phrasebook"
+    # The whole phrasebook is a single page
+    unit = (lang,)
+    if journal and unit in journal:
+        scraped_data.extend(journal.restore(unit))
+        return True
+
+    url = get_phrasebook_url(lang)
 
     # Get page
-    response = fetch_page(url)
+    response = fetch_page(url, RETRIES)
+
+    return process_page(lang, url, response, scraped_data, journal)
+
+
+async def scrape_langs_async(
+    langs: list[str],
+    scraped_data: dict[str, list],
+    scheduler: Scheduler,
+    journals: dict[str, Journal] | None = None,
+) -> bool:
+    """Scrapes several phrasebooks at once, interleaving their requests."""
+    journals = journals or {}
+
+    results = await asyncio.gather(
+        *(
+            scrape_async(lang, scraped_data[lang], scheduler, journals.get(lang))
+            for lang in langs
+        )
+    )
+
+    return all(results)
+
+
+async def scrape_async(
+    lang: str,
+    scraped_data: list,
+    scheduler: Scheduler,
+    journal: Journal | None = None,
+) -> bool:
+    """Scrapes phrasebook entries without blocking other requests."""
+    unit = (lang,)
+    if journal and unit in journal:
+        scraped_data.extend(journal.restore(unit))
+        return True
+
+    url = get_phrasebook_url(lang)
+
+    response = await fetch_page_async(url, RETRIES, scheduler)
+
+    return process_page(lang, url, response, scraped_data, journal)
+
+
+def get_phrasebook_url(lang: str) -> str:
+    """Constructs the url of a phrasebook."""
+    return f"https://en.wikivoyage.org/wiki/{SUPPORTED_LANGS[lang].capitalize()}_phrasebook"
+
+
+def process_page(
+    lang: str,
+    url: str,
+    response: bytes | None,
+    scraped_data: list,
+    journal: Journal | None = None,
+) -> bool:
+    """Extracts the entries of a fetched phrasebook and records them in the journal."""
+    unit = (lang,)
 
     if not response:
         print(f"Failed to fetch {url}")
         return False
 
+    started = perf_counter()
+
     soup = bs4.BeautifulSoup(response, "html.parser")
 
     # Find the phrase list section
@@ -68,6 +228,8 @@ def scrape(lang: str, scraped_data: list) -> bool:
         print(f"No phrase list found for {lang}.")
         return False
 
+    page_data: list[dict] = []
+
     # Iterate through each sub-section within the phrase list
     sections: list[bs4.element.Tag] = phrase_list_section.find_all("section")
     for section in sections:
@@ -97,25 +259,35 @@ def scrape(lang: str, scraped_data: list) -> bool:
                     "source": f"{url}#{category.capitalize().replace(' ', '_')}",
                 }
 
-                scraped_data.append(entry)
+                page_data.append(entry)
+
+    record_parse(perf_counter() - started)
+
+    if journal:
+        journal.record(unit, page_data)
+
+    scraped_data.extend(page_data)
 
     return True
 
 
-def export_scraped_data(lang: str, scraped_data: list, overwrite: bool = False):
+def export_scraped_data(
+    lang: str, scraped_data: list | NDJSONWriter, overwrite: bool = False
+) -> bool:
     """Exports scraped data to a JSON file."""
     if not scraped_data:
         logger.warning("No data to export.")
-        return
+        if isinstance(scraped_data, NDJSONWriter):
+            scraped_data.discard()
+        return False
 
     current_date = datetime.now().strftime("%Y-%m-%d")
 
     output_dir = os.path.join(SCRIPT_DIR, "scraped")
     os.makedirs(output_dir, exist_ok=True)
 
-    output_filename = (
-        f"phrasebook_{SOURCE_LANG}_{lang}_{len(scraped_data)}_{current_date}.json"
-    )
+    output_ext = "ndjson" if isinstance(scraped_data, NDJSONWriter) else "json"
+    output_filename = f"phrasebook_{SOURCE_LANG}_{lang}_{len(scraped_data)}_{current_date}.{output_ext}"
     output_path = os.path.join(output_dir, output_filename)
 
     if not overwrite:
@@ -126,24 +298,29 @@ def export_scraped_data(lang: str, scraped_data: list, overwrite: bool = False):
             output_path = f"{base}_{counter}{ext}"
             counter += 1
 
-    json_data = {
-        "meta": {
-            "lang": SOURCE_LANG,
-            "translation_lang": lang,
-            "date": current_date,
-            "total_entries": len(scraped_data),
-            "source_title": f"{SUPPORTED_LANGS[lang]} Wikivoyage Phrasebook",
-            "source_link": f"https://en.wikivoyage.org/wiki/{SUPPORTED_LANGS[lang].capitalize()}_phrasebook",
-        },
-        "entries": scraped_data,
+    meta = {
+        "lang": SOURCE_LANG,
+        "translation_lang": lang,
+        "date": current_date,
+        "total_entries": len(scraped_data),
+        "source_title": f"{SUPPORTED_LANGS[lang]} Wikivoyage Phrasebook",
+        "source_link": f"https://en.wikivoyage.org/wiki/{SUPPORTED_LANGS[lang].capitalize()}_phrasebook",
     }
 
+    # Streamed entries are already on disk
+    if isinstance(scraped_data, NDJSONWriter):
+        return scraped_data.close(output_path, meta)
+
+    json_data = {"meta": meta, "entries": scraped_data}
+
     try:
         with open(output_path, "w", encoding="utf-8") as file:
             json.dump(json_data, file, indent=2, ensure_ascii=False)
         logger.info(f"Data successfully exported to:\n{output_path}")
+        return True
     except IOError as e:
         logger.error(f"Failed to export data: {e}")
+        return False
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Iterable, Iterator
+from utils.logger import logger
+
+
+RESULT_FILENAME = "result.json"
+READ_SIZE = 1 << 20
+# Average entries per cached chunk, independent of the worker count so runs share chunks
+DEFAULT_CHUNK_SIZE = 500
+# Entries are kept this many seconds after their last use, so runs on other input
+# files sharing a cache, including concurrent ones, do not evict each other's
+MAX_UNUSED_AGE = 30 * 24 * 60 * 60
+
+
+def add_build_cache_arguments(argparser: argparse.ArgumentParser) -> None:
+    """Adds the build cache options to a command line parser."""
+    argparser.add_argument(
+        "--no-build-cache",
+        action="store_true",
+        help="Parse every input again instead of reusing the results of earlier runs.",
+    )
+
+
+class BuildCache:
+    """Parsed results stored under a hash of their input and the parser's code.
+
+    Each entry is a directory with a `result.json` and any files written next
+    to it. An entry counts as stored once its result is saved, so entries left
+    by an interrupted run are never used. Entries not used for a while are
+    removed by `evict_unused`.
+    """
+
+    def __init__(self, dir_path: str, version: str):
+        self.dir_path = dir_path
+        self.version = version
+        self.used = set()
+        self.stats = {"hits": 0, "misses": 0}
+
+        os.makedirs(dir_path, exist_ok=True)
+
+    def make_key(self, *digests: bytes) -> str:
+        """Makes the key of an input from digests of its parts."""
+        hasher = hashlib.sha256(self.version.encode())
+        for digest in digests:
+            hasher.update(digest)
+        return hasher.hexdigest()
+
+    def split(
+        self, items: Iterable, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[tuple[str, list]]:
+        """Splits JSON-serializable items into keyed chunks of about a chunk size.
+
+        Chunks end after items whose digest matches a pattern rather than at
+        fixed counts, so adding or removing an item only changes its own chunk.
+        """
+        min_size = max(1, chunk_size // 4)
+        chunk, digests = [], []
+        for item in items:
+            digest = hashlib.sha256(
+                json.dumps(item, sort_keys=True, ensure_ascii=False).encode()
+            ).digest()
+            chunk.append(item)
+            digests.append(digest)
+
+            if len(chunk) >= min_size and (
+                int.from_bytes(digest[:4], "big") % chunk_size == 0
+                or len(chunk) >= chunk_size * 4
+            ):
+                yield self.make_key(*digests), chunk
+                chunk, digests = [], []
+
+        if chunk:
+            yield self.make_key(*digests), chunk
+
+    def get_path(self, key: str) -> str:
+        """Gets the directory of an entry, keeping it from eviction."""
+        self.used.add(key)
+        return os.path.join(self.dir_path, key)
+
+    def load(self, key: str):
+        """Loads the result of an entry, or None if it is not stored."""
+        try:
+            with open(
+                os.path.join(self.get_path(key), RESULT_FILENAME), "r", encoding="utf-8"
+            ) as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        try:
+            # The modification time of an entry records its last use
+            os.utime(self.get_path(key))
+        except OSError:
+            pass
+        return result
+
+    def save(self, key: str, result) -> None:
+        """Stores the result of an entry after the files in its directory are written."""
+        path = os.path.join(self.get_path(key), RESULT_FILENAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False)
+        os.replace(path + ".part", path)
+
+    def evict_unused(self, max_age: float = MAX_UNUSED_AGE) -> None:
+        """Removes the entries unused by this run and for the last max age seconds."""
+        evicted = 0
+        now = time.time()
+        for key in os.listdir(self.dir_path):
+            path = os.path.join(self.dir_path, key)
+            try:
+                if key in self.used or now - os.stat(path).st_mtime < max_age:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            evicted += 1
+
+        logger.info(
+            f"Build cache: {self.stats['hits']} reused, {self.stats['misses']} parsed, {evicted} evicted"
+        )
+
+
+def hash_file(path: str) -> bytes:
+    """Gets the SHA-256 digest of a file's content."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(READ_SIZE):
+            hasher.update(block)
+    return hasher.digest()
+
+
+def get_code_version(*paths: str) -> str:
+    """Gets a version that changes whenever one of the source files changes."""
+    return hashlib.sha256(b"".join(hash_file(path) for path in paths)).hexdigest()
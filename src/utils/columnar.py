@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import sys
+from typing import Iterable, Iterator
+from utils.json_stream import iter_entries_json
+from utils.logger import logger
+from utils.parallel import batched
+
+
+# Rows per record batch, and so per Parquet row group
+BATCH_SIZE = 50_000
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+# Column kinds: plain strings, dictionary-encoded strings and lists of strings. Only
+# columns with few distinct values are dictionary-encoded, as near-unique ones like
+# links would only grow the dictionary.
+STRING = "string"
+CATEGORY = "category"
+STRINGS = "strings"
+
+# Table layouts, found by the second language key of the meta. Entry fields are
+# prefixed with `entry_` where they clash with the fields of their items.
+LAYOUTS = {
+    "definition_lang": {
+        "entry_columns": {
+            "word": STRING,
+            "source_title": CATEGORY,
+            "source_link": STRING,
+        },
+        "items_key": "definitions",
+        "index_column": "definition_index",
+        "item_columns": {
+            "description": STRING,
+            "pos": CATEGORY,
+            "origin": STRING,
+            "usage_note": STRING,
+            "synonyms": STRINGS,
+            "antonyms": STRINGS,
+            "inflections": STRINGS,
+            "examples": STRINGS,
+            "source_title": CATEGORY,
+            "source_link": STRING,
+        },
+    },
+    "translation_lang": {
+        "entry_columns": {
+            "phrase": STRING,
+            "categories": STRINGS,
+            "usage_note": STRING,
+            "source_title": CATEGORY,
+            "source_link": STRING,
+        },
+        "items_key": "translations",
+        "index_column": "translation_index",
+        "item_columns": {
+            "content": STRING,
+            "examples": STRINGS,
+            "source_title": CATEGORY,
+            "source_link": STRING,
+        },
+    },
+}
+
+
+def main():
+    # Parse arguments
+    argparser = argparse.ArgumentParser(
+        description="Convert a JSON dictionary or phrasebook to a columnar Parquet or Arrow file with one row per definition or translation."
+    )
+    argparser.add_argument("input_file", help="Path to the input JSON file.")
+    argparser.add_argument(
+        "output_file",
+        nargs="?",
+        help="Path to the output `.parquet`, `.arrow` or `.feather` file. Defaults to the input path with a `.parquet` extension.",
+    )
+    argparser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help=f"Rows converted and written at a time. Defaults to {BATCH_SIZE}.",
+    )
+    args = argparser.parse_args()
+
+    output_path = args.output_file or os.path.splitext(args.input_file)[0] + ".parquet"
+
+    if not convert_to_columnar(args.input_file, output_path, args.batch_size):
+        sys.exit(1)
+
+
+def convert_to_columnar(
+    input_path: str, output_path: str, batch_size: int = BATCH_SIZE
+) -> bool:
+    """Converts a `{meta, entries}` file to a columnar file in batches of rows.
+
+    Entries without definitions or translations are kept as one row with
+    empty item columns. The meta is stored in the schema metadata.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        logger.error(
+            "Columnar export requires pyarrow. Install it with `poetry install --extras columnar`."
+        )
+        return False
+
+    output_format = FORMATS.get(os.path.splitext(output_path)[1].lower())
+    if not output_format:
+        logger.error(f"Unsupported output format: {output_path}")
+        return False
+
+    part_path = output_path + ".part"
+    try:
+        meta, entries = iter_entries_json(input_path)
+        columns = get_columns(meta)
+        types = {
+            STRING: pa.string(),
+            CATEGORY: pa.dictionary(pa.int32(), pa.string()),
+            STRINGS: pa.list_(pa.string()),
+            "index": pa.int32(),
+        }
+        schema = pa.schema(
+            [(name, types[kind]) for name, kind in columns.items()],
+            metadata={"meta": json.dumps(meta, ensure_ascii=False)},
+        )
+        encoders = {
+            name: DictionaryEncoder()
+            for name, kind in columns.items()
+            if kind == CATEGORY
+        }
+
+        if output_format == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(
+                part_path, schema, compression="zstd"
+            )
+        else:
+            # Dictionaries only grow, so later batches are written as deltas
+            writer = pyarrow.ipc.new_file(
+                part_path,
+                schema,
+                options=pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+            )
+
+        count = 0
+        with writer:
+            for rows in batched(iter_rows(entries, meta), batch_size):
+                arrays = []
+                for (name, kind), values in zip(columns.items(), zip(*rows)):
+                    if kind == CATEGORY:
+                        arrays.append(encoders[name].encode(values))
+                    else:
+                        arrays.append(pa.array(values, type=types[kind]))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                count += len(rows)
+
+        os.replace(part_path, output_path)
+        logger.info(f"Converted {count} rows to {output_path}")
+        return True
+    except (IOError, ValueError, KeyError, TypeError, pa.ArrowException) as e:
+        logger.error(f"Failed to convert {input_path}: {e}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return False
+
+
+def get_layout(meta: dict) -> tuple[str, dict]:
+    """Gets the second language key and table layout of a dictionary or phrasebook."""
+    for lang_key, layout in LAYOUTS.items():
+        if lang_key in meta:
+            return lang_key, layout
+    raise ValueError("Not a dictionary or phrasebook")
+
+
+def get_columns(meta: dict) -> dict[str, str]:
+    """Gets the names and kinds of the columns of a dictionary or phrasebook table."""
+    lang_key, layout = get_layout(meta)
+    item_columns = layout["item_columns"]
+
+    columns = {"entry_index": "index", "lang": CATEGORY, lang_key: CATEGORY}
+    for name, kind in layout["entry_columns"].items():
+        columns[f"entry_{name}" if name in item_columns else name] = kind
+    columns[layout["index_column"]] = "index"
+    columns.update(item_columns)
+    return columns
+
+
+def iter_rows(entries: Iterable[dict], meta: dict) -> Iterator[tuple]:
+    """Flattens entries into one row per definition or translation, in column order."""
+    lang_key, layout = get_layout(meta)
+    entry_keys = list(layout["entry_columns"])
+    item_keys = list(layout["item_columns"])
+    langs = (meta.get("lang"), meta.get(lang_key))
+
+    for entry_index, entry in enumerate(entries):
+        head = (entry_index, *langs, *(entry.get(key) for key in entry_keys))
+        items = entry.get(layout["items_key"]) or []
+        if not items:
+            yield (*head, None, *(None for _ in item_keys))
+        for item_index, item in enumerate(items):
+            yield (*head, item_index, *(item.get(key) for key in item_keys))
+
+
+class DictionaryEncoder:
+    """Encodes strings against one dictionary that only grows across batches.
+
+    Arrow IPC files can only extend a dictionary with deltas, not replace it.
+    """
+
+    def __init__(self):
+        self.indices: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def encode(self, values: Iterable[str | None]):
+        import pyarrow as pa
+
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            index = self.indices.get(value)
+            if index is None:
+                index = self.indices[value] = len(self.values)
+                self.values.append(value)
+            indices.append(index)
+
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+from utils.http_cache import get_cache_stats
+from utils.http_session import get_session_stats
+from utils.logger import logger
+from utils.rate_limit import get_throttle_stats
+
+
+DEFAULT_REPORT_INTERVAL = 60.0
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_lock = threading.Lock()
+_started = time.monotonic()
+_started_at = datetime.now().isoformat(timespec="seconds")
+_hosts: dict[str, dict[str, int]] = {}
+_latencies: dict[str, list[int]] = {}
+_latency_totals: dict[str, float] = {}
+_pages = 0
+
+
+def add_report_arguments(argparser: argparse.ArgumentParser, default_dir: str) -> None:
+    """Adds the crawl report options to a command line parser."""
+    argparser.add_argument(
+        "--report",
+        default=os.path.join(
+            default_dir, f"report_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json"
+        ),
+        help="Path to the JSON crawl report. Defaults to `reports/report_<time>.json`.",
+    )
+    argparser.add_argument(
+        "--report-interval",
+        type=float,
+        default=DEFAULT_REPORT_INTERVAL,
+        help=f"Seconds between report updates during the crawl. Defaults to {DEFAULT_REPORT_INTERVAL:g}.",
+    )
+
+
+def start_crawl() -> None:
+    """Starts the crawl clock that throughput is measured from."""
+    global _started, _started_at
+
+    with _lock:
+        _started = time.monotonic()
+        _started_at = datetime.now().isoformat(timespec="seconds")
+
+
+def record_request(url: str, seconds: float, size: int) -> None:
+    """Records a completed request and its downloaded bytes."""
+    with _lock:
+        host = _get_host_stats(url)
+        host["requests"] += 1
+        host["bytes"] += size
+        _record_latency("request", seconds)
+
+
+def record_retry(url: str) -> None:
+    """Records a failed attempt that will be retried."""
+    with _lock:
+        _get_host_stats(url)["retries"] += 1
+
+
+def record_failure(url: str) -> None:
+    """Records a page that could not be fetched."""
+    with _lock:
+        _get_host_stats(url)["failures"] += 1
+
+
+def record_parse(seconds: float) -> None:
+    """Records a parsed page."""
+    global _pages
+
+    with _lock:
+        _pages += 1
+        _record_latency("parse", seconds)
+
+
+def get_report() -> dict:
+    """Gets the throughput, latency and per-host counts of the crawl so far."""
+    with _lock:
+        elapsed = time.monotonic() - _started
+        hosts = {host: dict(stats) for host, stats in _hosts.items()}
+        total_bytes = sum(stats["bytes"] for stats in hosts.values())
+
+        report = {
+            "started_at": _started_at,
+            "elapsed_seconds": round(elapsed, 3),
+            "pages": _pages,
+            "pages_per_second": round(_pages / elapsed, 3) if elapsed else 0,
+            "bytes": total_bytes,
+            "bytes_per_second": round(total_bytes / elapsed, 3) if elapsed else 0,
+            "latency_ms": {
+                name: _summarize_latency(name) for name in ("request", "parse")
+            },
+            "hosts": hosts,
+        }
+
+    report["connections"] = get_session_stats()
+    report["cache"] = get_cache_stats()
+    report["throttling"] = get_throttle_stats()
+    return report
+
+
+def write_report(path: str) -> bool:
+    """Writes the crawl report to a JSON file."""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(get_report(), file, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, TypeError) as e:
+        logger.error(f"Failed to write crawl report: {e}")
+        return False
+
+
+def start_periodic_report(path: str, interval: float = DEFAULT_REPORT_INTERVAL):
+    """Writes the crawl report every `interval` seconds until the returned event is set."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            write_report(path)
+
+    threading.Thread(target=run, daemon=True).start()
+    return stop
+
+
+def _get_host_stats(url: str) -> dict[str, int]:
+    host = urlsplit(url).netloc
+    if host not in _hosts:
+        _hosts[host] = {"requests": 0, "bytes": 0, "retries": 0, "failures": 0}
+    return _hosts[host]
+
+
+def _record_latency(name: str, seconds: float) -> None:
+    if name not in _latencies:
+        _latencies[name] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        _latency_totals[name] = 0.0
+
+    _latencies[name][bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+    _latency_totals[name] += seconds * 1000
+
+
+def _summarize_latency(name: str) -> dict:
+    counts = _latencies.get(name, [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    total = sum(counts)
+    bounds = [*LATENCY_BUCKETS_MS, None]
+
+    def percentile(fraction: float):
+        # Upper bound of the bucket holding the percentile, None if unbounded
+        target = fraction * total
+        seen = 0
+        for bound, count in zip(bounds, counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    return {
+        "count": total,
+        "mean": round(_latency_totals.get(name, 0.0) / total, 3) if total else 0,
+        "p50": percentile(0.5) if total else 0,
+        "p90": percentile(0.9) if total else 0,
+        "p99": percentile(0.99) if total else 0,
+        "buckets": {
+            f"le_{bound}" if bound else "inf": count
+            for bound, count in zip(bounds, counts)
+        },
+    }
@@ -0,0 +1,227 @@
+import argparse
+import json
+import mmap
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Iterator
+from utils.json_stream import read_entries_json
+from utils.logger import logger
+
+
+# Decoded entries kept for repeated lookups
+DEFAULT_CACHE_SIZE = 1024
+# Key of the headword of each entry, found by the second language key of the meta
+HEADWORD_KEYS = {"definition_lang": "word", "translation_lang": "phrase"}
+
+# Layout of files written by `write_entries_json` and `json.dump(..., indent=2)`:
+# entries start at lines indented by four spaces and their keys by six
+INDENTED_HEADER = b'{\n  "meta": '
+INDENTED_ENTRIES = b'\n  "entries": ['
+ENTRY_PATTERN = rb'\n    \{|\n      "%s": ("(?:[^"\\\n]|\\.)*")'
+
+DECODER = json.JSONDecoder()
+
+
+class Dictionary:
+    """A parsed dictionary or phrasebook whose entries are decoded only when looked up.
+
+    Opening scans the file once for where each entry starts and what its
+    headword is, and keeps the headwords sorted in one string with the
+    offsets of their entries. Files in the indented layout written by the
+    parsers are read through a memory map. Other files are decoded once into
+    a packed store of compact JSON.
+
+    Looked up entries are shared with the cache, so they should not be changed.
+    """
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            with open(path, "r", encoding="utf-8") as text_file:
+                self.meta, _ = read_entries_json(text_file)
+            headword_key = next(
+                (HEADWORD_KEYS[key] for key in HEADWORD_KEYS if key in self.meta),
+                None,
+            )
+            if not headword_key:
+                raise ValueError("Not a dictionary or phrasebook")
+
+            self.data = self.map_file()
+            if self.data is not None:
+                headwords = self.index_indented(headword_key)
+            else:
+                headwords = self.index_packed(headword_key)
+        except Exception:
+            self.file.close()
+            raise
+
+        # Entry numbers sorted by headword, keeping the file order of equal headwords
+        order = sorted(
+            (number for number, word in enumerate(headwords) if word is not None),
+            key=headwords.__getitem__,
+        )
+        self.order = array("I", order)
+        self.headwords = "".join(headwords[number] for number in order)
+        self.headword_starts = array(
+            "I", accumulate((len(headwords[number]) for number in order), initial=0)
+        )
+
+        # Recently decoded entries by their position in the file, oldest first
+        self.cache: OrderedDict[int, dict] = OrderedDict()
+        self.cache_size = cache_size
+        logger.debug(f"Indexed {len(self)} entries of {path}")
+
+    def map_file(self) -> mmap.mmap | None:
+        """Maps the file if it has the indented layout, or returns None."""
+        try:
+            data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return None
+        if (
+            data[: len(INDENTED_HEADER)] == INDENTED_HEADER
+            and data.find(INDENTED_ENTRIES) != -1
+        ):
+            return data
+        data.close()
+        return None
+
+    def index_indented(self, headword_key: str) -> list[str | None]:
+        """Finds the offsets and headwords of the entries of an indented file."""
+        self.starts = array("Q")
+        headwords = []
+        pattern = re.compile(ENTRY_PATTERN % re.escape(headword_key).encode())
+        for match in pattern.finditer(self.data, self.data.find(INDENTED_ENTRIES)):
+            token = match.group(1)
+            if token is None:
+                # Skip the newline and indentation before the brace
+                self.starts.append(match.start() + 5)
+                headwords.append(None)
+            elif headwords and headwords[-1] is None:
+                # Only strings with escapes need a JSON decoder
+                headwords[-1] = (
+                    json.loads(token) if b"\\" in token else token[1:-1].decode("utf-8")
+                )
+        self.starts.append(len(self.data))
+        return headwords
+
+    def index_packed(self, headword_key: str) -> list[str | None]:
+        """Decodes the entries of a file once into a packed store of compact JSON."""
+        logger.info(f"{self.path} is not indented, packing its entries in memory...")
+        self.data = bytearray()
+        self.starts = array("Q")
+        headwords = []
+        self.file.close()
+        with open(self.path, "r", encoding="utf-8") as text_file:
+            _, entries = read_entries_json(text_file)
+            for entry in entries:
+                self.starts.append(len(self.data))
+                self.data += json.dumps(
+                    entry, ensure_ascii=False, separators=(",", ":")
+                ).encode("utf-8")
+                word = entry.get(headword_key)
+                headwords.append(word if isinstance(word, str) else None)
+        self.starts.append(len(self.data))
+        return headwords
+
+    def decode(self, number: int) -> dict:
+        """Decodes an entry by its position in the file, keeping it in the cache."""
+        entry = self.cache.get(number)
+        if entry is not None:
+            self.cache.move_to_end(number)
+            return entry
+
+        text = self.data[self.starts[number] : self.starts[number + 1]].decode("utf-8")
+        entry = self.cache[number] = DECODER.raw_decode(text)[0]
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return entry
+
+    def get_headword(self, index: int) -> str:
+        """Gets a headword by its position in sorted order."""
+        return self.headwords[
+            self.headword_starts[index] : self.headword_starts[index + 1]
+        ]
+
+    def find(self, word: str) -> int:
+        """Gets the sorted position of the first headword not less than a word."""
+        return bisect_left(range(len(self)), word, key=self.get_headword)
+
+    def lookup(self, word: str) -> list[dict]:
+        """Gets the entries of a headword, in file order."""
+        entries = []
+        index = self.find(word)
+        while index < len(self) and self.get_headword(index) == word:
+            entries.append(self.decode(self.order[index]))
+            index += 1
+        return entries
+
+    def iter_headwords(self, prefix: str = "") -> Iterator[str]:
+        """Iterates over the distinct headwords starting with a prefix, in sorted order."""
+        previous = None
+        for index in range(self.find(prefix), len(self)):
+            word = self.get_headword(index)
+            if not word.startswith(prefix):
+                break
+            if word != previous:
+                yield word
+                previous = word
+
+    def __contains__(self, word: str) -> bool:
+        index = self.find(word)
+        return index < len(self) and self.get_headword(index) == word
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> "Dictionary":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def main():
+    # Parse arguments
+    argparser = argparse.ArgumentParser(
+        description="Look up words in a parsed JSON dictionary or phrasebook."
+    )
+    argparser.add_argument("input_file", help="Path to the JSON file.")
+    argparser.add_argument("words", nargs="+", help="Headwords to look up.")
+    argparser.add_argument(
+        "--prefix",
+        action="store_true",
+        help="List the headwords starting with each word instead of their entries.",
+    )
+    args = argparser.parse_args()
+
+    try:
+        dictionary = Dictionary(args.input_file)
+    except (IOError, ValueError, KeyError) as e:
+        logger.error(f"Failed to open {args.input_file}: {e}")
+        sys.exit(1)
+
+    with dictionary:
+        for word in args.words:
+            if args.prefix:
+                print("\n".join(dictionary.iter_headwords(word)))
+                continue
+            entries = dictionary.lookup(word)
+            if not entries:
+                logger.warning(f"No entries for {word}")
+            for entry in entries:
+                print(json.dumps(entry, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
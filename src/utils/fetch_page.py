@@ -1,7 +1,12 @@
+import asyncio
+import contextlib
 import requests
-from time import sleep
+from time import perf_counter, sleep
 from typing import Any
+from utils import crawl_stats, http_cache, rate_limit
+from utils.http_session import get_session
 from utils.logger import logger
+from utils.scheduler import Scheduler
 from utils.user_agents import get_random_user_agent
 
 
@@ -10,18 +15,109 @@ def fetch_page(url: str, retries=0) -> bytes | Any:
     if retries < 0:
         raise ValueError("Number of retries must be a non-negative integer.")
 
-    headers = {"User-Agent": get_random_user_agent()}
+    cached, content = get_cached_page(url)
+    if content is not None or http_cache.is_offline():
+        return content
+
+    for attempt in range(retries + 1):
+        # Wait for the host's rate limit
+        sleep(rate_limit.get_bucket(url).reserve())
+
+        try:
+            return request_page(url, cached)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Attempt {attempt+1} failed: {e}")
+            if attempt == retries or not is_retryable(e):
+                break
+            crawl_stats.record_retry(url)
+            # Retry-After already pauses the host through its rate limit bucket
+            sleep(rate_limit.get_backoff_delay(attempt))
+
+    crawl_stats.record_failure(url)
+    logger.error(f"Failed to fetch {url} after {attempt+1} attempts.")
+    return None
+
+
+async def fetch_page_async(
+    url: str, retries=0, scheduler: Scheduler | None = None
+) -> bytes | Any:
+    """Fetches a webpage in a worker thread once the scheduler allows it.
+
+    Rate limit waits and backoffs happen on the event loop without holding a
+    scheduler slot, so they never stall other requests.
+    """
+    if retries < 0:
+        raise ValueError("Number of retries must be a non-negative integer.")
+
+    cached, content = await asyncio.to_thread(get_cached_page, url)
+    if content is not None or http_cache.is_offline():
+        return content
+
+    for attempt in range(retries + 1):
+        await asyncio.sleep(rate_limit.get_bucket(url).reserve())
 
-    attempt = 0
-    while attempt <= retries:
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.content
+            async with scheduler.slot(url) if scheduler else contextlib.nullcontext():
+                return await asyncio.to_thread(request_page, url, cached)
         except requests.exceptions.RequestException as e:
             logger.warning(f"Attempt {attempt+1} failed: {e}")
-            attempt += 1
-            sleep(2 * (attempt + 1))  # Exponentially increasing backoff
+            if attempt == retries or not is_retryable(e):
+                break
+            crawl_stats.record_retry(url)
+            # Retry-After already pauses the host through its rate limit bucket
+            await asyncio.sleep(rate_limit.get_backoff_delay(attempt))
 
-    logger.error(f"Failed to fetch {url} after {retries} attempts.")
+    crawl_stats.record_failure(url)
+    logger.error(f"Failed to fetch {url} after {attempt+1} attempts.")
     return None
+
+
+def get_cached_page(url: str) -> tuple[dict | None, bytes | None]:
+    """Gets the cache record of a page and its content if it needs no request."""
+    cached = http_cache.lookup(url)
+
+    # Serve fresh pages from the cache without touching the network
+    if cached and (http_cache.is_offline() or http_cache.is_fresh(cached)):
+        if (content := http_cache.read_body(cached)) is not None:
+            return cached, content
+
+    if http_cache.is_offline():
+        logger.error(f"{url} is not cached and the cache is offline.")
+
+    return cached, None
+
+
+def request_page(url: str, cached: dict | None = None) -> bytes:
+    """Requests a page once, revalidating its cached copy if there is one."""
+    # A random User-Agent per request, while the connection is still pooled
+    headers = {
+        "User-Agent": get_random_user_agent(),
+        **http_cache.get_conditional_headers(cached),
+    }
+    started = perf_counter()
+    response = get_session(url).get(url, headers=headers, timeout=10)
+    crawl_stats.record_request(url, perf_counter() - started, len(response.content))
+    rate_limit.record_response(url, response.status_code, response.headers)
+
+    # Unchanged since it was cached
+    if response.status_code == 304 and cached:
+        content = http_cache.read_body(cached, revalidated=True)
+        if content is not None:
+            return content
+
+        # The cached body is gone, so download the page again
+        return request_page(url)
+
+    response.raise_for_status()
+    http_cache.store(url, response.content, response.headers)
+    return response.content
+
+
+def is_retryable(error: requests.exceptions.RequestException) -> bool:
+    """Checks if a failed request may succeed when retried."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+
+    # Client errors won't change, except for timeouts and throttling
+    return response.status_code >= 500 or response.status_code in {408, 429}
@@ -16,3 +16,4 @@ def on_exit(callback, message="Process interrupted. Exiting..."):
             sys.exit(0)
 
     signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
@@ -0,0 +1,280 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from utils.logger import logger
+
+
+DEFAULT_MAX_AGE = 24 * 60 * 60  # 1 day
+DEFAULT_MAX_SIZE = 1024**3  # 1 GiB
+
+_config = {
+    "cache_dir": None,
+    "max_age": DEFAULT_MAX_AGE,
+    "max_size": DEFAULT_MAX_SIZE,
+    "offline": False,
+}
+_stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+_lock = threading.Lock()
+_size = 0
+
+
+def add_cache_arguments(
+    argparser: argparse.ArgumentParser, default_cache_dir: str
+) -> None:
+    """Adds the response cache options to a command line parser."""
+    argparser.add_argument(
+        "--cache-dir",
+        default=default_cache_dir,
+        help="Directory of the HTTP response cache. Defaults to `cache/`.",
+    )
+    argparser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always download pages instead of using the response cache.",
+    )
+    argparser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE / 3600,
+        help="Hours a cached page is used without revalidation. Defaults to 24.",
+    )
+    argparser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE // 1024**2,
+        help="Size limit of the response cache in MiB. Defaults to 1024.",
+    )
+    argparser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only use cached pages and never access the network.",
+    )
+
+
+def configure_cache_from_args(args: argparse.Namespace) -> None:
+    """Configures the response cache from parsed command line options."""
+    if args.no_cache:
+        return
+
+    configure_cache(
+        args.cache_dir,
+        max_age=args.cache_max_age * 3600,
+        max_size=args.cache_max_size * 1024**2,
+        offline=args.offline,
+    )
+
+
+def configure_cache(
+    cache_dir: str,
+    max_age: float = DEFAULT_MAX_AGE,
+    max_size: int = DEFAULT_MAX_SIZE,
+    offline: bool = False,
+) -> None:
+    """Enables the on-disk response cache."""
+    global _size
+
+    if max_age < 0 or max_size < 0:
+        raise ValueError("Cache max age and size must be non-negative.")
+
+    os.makedirs(os.path.join(cache_dir, "index"), exist_ok=True)
+    os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+
+    with _lock:
+        _config.update(
+            cache_dir=cache_dir, max_age=max_age, max_size=max_size, offline=offline
+        )
+        _size = sum(size for _, size in _iter_bodies())
+        _evict()
+
+    logger.info(f"Using response cache at {cache_dir} ({_size / 1024**2:.1f} MiB)")
+
+
+def is_enabled() -> bool:
+    """Checks if the response cache is enabled."""
+    return _config["cache_dir"] is not None
+
+
+def is_offline() -> bool:
+    """Checks if pages must only be served from the cache."""
+    return is_enabled() and _config["offline"]
+
+
+def lookup(url: str) -> dict | None:
+    """Gets the cache record of a url if its body is still stored."""
+    if not is_enabled():
+        return None
+
+    try:
+        with open(_index_path(url), "r", encoding="utf-8") as file:
+            record = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if not os.path.exists(_body_path(record["body"])):
+        return None
+
+    return record
+
+
+def is_fresh(record: dict) -> bool:
+    """Checks if a cached response can be used without revalidation."""
+    return time.time() - record["validated_at"] <= _config["max_age"]
+
+
+def get_conditional_headers(record: dict | None) -> dict[str, str]:
+    """Gets the headers to revalidate a cached response."""
+    headers = {}
+    if record:
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+    return headers
+
+
+def read_body(record: dict, revalidated: bool = False) -> bytes | None:
+    """Reads the body of a cached response and marks it as recently used."""
+    try:
+        with open(_body_path(record["body"]), "rb") as file:
+            content = file.read()
+    except OSError:
+        return None
+
+    record["accessed_at"] = time.time()
+    if revalidated:
+        record["validated_at"] = record["accessed_at"]
+    _write_record(record)
+
+    with _lock:
+        _stats["revalidated" if revalidated else "hits"] += 1
+
+    return content
+
+
+def store(url: str, content: bytes, headers) -> None:
+    """Stores a response, sharing the body file with identical responses."""
+    global _size
+
+    if not is_enabled():
+        return
+
+    digest = hashlib.sha256(content).hexdigest()
+    body_path = _body_path(digest)
+
+    with _lock:
+        _stats["misses"] += 1
+
+        if not os.path.exists(body_path):
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            _atomic_write(body_path, content)
+            _size += len(content)
+            _stats["stored"] += 1
+
+        now = time.time()
+        _write_record(
+            {
+                "url": url,
+                "body": digest,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "validated_at": now,
+                "accessed_at": now,
+            }
+        )
+
+        if _size > _config["max_size"]:
+            _evict()
+
+
+def get_cache_stats() -> dict[str, int]:
+    """Gets the number of cache hits, revalidations, misses and evictions."""
+    with _lock:
+        return dict(_stats)
+
+
+def log_cache_stats() -> None:
+    """Logs how many pages were served from the cache."""
+    if not is_enabled():
+        return
+
+    stats = get_cache_stats()
+    logger.info(
+        f"Response cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+        f"{stats['misses']} downloaded, {stats['evicted']} evicted"
+    )
+
+
+def _evict() -> None:
+    """Removes the least recently used responses until the cache fits its size limit."""
+    global _size
+
+    if _size <= _config["max_size"]:
+        return
+
+    index_dir = os.path.join(_config["cache_dir"], "index")
+    records = []
+    for filename in os.listdir(index_dir):
+        try:
+            with open(os.path.join(index_dir, filename), "r", encoding="utf-8") as file:
+                records.append((json.load(file), os.path.join(index_dir, filename)))
+        except (OSError, ValueError):
+            continue
+
+    body_sizes = dict(_iter_bodies())
+
+    # Bodies can be shared, so a body is only freed with its last record
+    references: dict[str, int] = {}
+    for record, _ in records:
+        references[record["body"]] = references.get(record["body"], 0) + 1
+
+    records.sort(key=lambda item: item[0].get("accessed_at", 0))
+    for record, index_path in records:
+        if _size <= _config["max_size"]:
+            break
+
+        os.remove(index_path)
+        _stats["evicted"] += 1
+
+        references[record["body"]] -= 1
+        if references[record["body"]] == 0 and record["body"] in body_sizes:
+            os.remove(_body_path(record["body"]))
+            _size -= body_sizes.pop(record["body"])
+
+    # Drop bodies no longer referenced by any record
+    for digest, size in body_sizes.items():
+        if not references.get(digest):
+            os.remove(_body_path(digest))
+            _size -= size
+
+
+def _iter_bodies():
+    """Iterates over the digests and sizes of the stored bodies."""
+    bodies_dir = os.path.join(_config["cache_dir"], "bodies")
+    for prefix in os.listdir(bodies_dir):
+        for digest in os.listdir(os.path.join(bodies_dir, prefix)):
+            if not digest.endswith(".tmp"):
+                yield digest, os.path.getsize(os.path.join(bodies_dir, prefix, digest))
+
+
+def _index_path(url: str) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(_config["cache_dir"], "index", f"{key}.json")
+
+
+def _body_path(digest: str) -> str:
+    return os.path.join(_config["cache_dir"], "bodies", digest[:2], digest)
+
+
+def _write_record(record: dict) -> None:
+    data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+    _atomic_write(_index_path(record["url"]), data)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,87 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from utils.logger import logger
+
+
+DEFAULT_POOL_MAXSIZE = 10
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+
+
+def get_session(url: str) -> requests.Session:
+    """Gets the shared keep-alive session for the host of a url."""
+    host = urlsplit(url).netloc
+
+    with _sessions_lock:
+        if (session := _sessions.get(host)) is None:
+            session = requests.Session()
+
+            # Keep up to `_pool_maxsize` idle connections open for reuse
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_pool_maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            _sessions[host] = session
+
+    return session
+
+
+def set_pool_maxsize(size: int) -> None:
+    """Sets the number of connections kept alive per host for new sessions."""
+    global _pool_maxsize
+
+    if size < 1:
+        raise ValueError("Pool size must be a positive integer.")
+
+    _pool_maxsize = size
+
+
+def get_session_stats() -> dict[str, dict[str, int]]:
+    """Gets the number of requests and opened connections per host."""
+    stats = {}
+
+    with _sessions_lock:
+        sessions = list(_sessions.items())
+
+    for host, session in sessions:
+        requests_count = 0
+        connections_count = 0
+
+        # The same adapter is mounted for both schemes
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+
+        stats[host] = {
+            "requests": requests_count,
+            "connections": connections_count,
+            "reused": max(requests_count - connections_count, 0),
+        }
+
+    return stats
+
+
+def log_session_stats() -> None:
+    """Logs how often connections were reused per host."""
+    for host, stats in get_session_stats().items():
+        reuse_rate = stats["reused"] / stats["requests"] if stats["requests"] else 0
+        logger.info(
+            f"Connections to {host}: {stats['requests']} requests over "
+            f"{stats['connections']} connections ({reuse_rate:.0%} reused)"
+        )
+
+
+def close_sessions() -> None:
+    """Closes every shared session and its pooled connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,111 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable
+from utils.logger import logger
+
+
+class Journal:
+    """Append-only record of completed scraping units and their scraped data.
+
+    Journals written before units had data only hold their entries. These
+    are converted with `upgrade`, or scraped again if it is not given. A
+    journal left by an interrupted scrape is moved aside rather than
+    overwritten when not resuming.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        resume: bool = False,
+        upgrade: Callable[[Any], Any] | None = None,
+    ):
+        self.path = path
+        self.completed: dict[tuple, Any] = {}
+
+        if resume:
+            self.completed = load_journal(path, upgrade)
+            logger.info(
+                f"Resuming from {path} with {len(self.completed)} completed units."
+            )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not resume:
+            rotate_journal(path)
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+        # Terminate a partially written record so new records start on their own line
+        if resume and self.file.tell() > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def __contains__(self, unit: tuple) -> bool:
+        return unit in self.completed
+
+    def restore(self, unit: tuple) -> Any:
+        """Takes the data of a completed unit out of the journal."""
+        return self.completed.pop(unit, None)
+
+    def record(self, unit: tuple, data: Any) -> None:
+        """Durably records a completed unit and its JSON serializable data."""
+        line = json.dumps({"unit": unit, "data": data}, ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self, remove: bool = False) -> None:
+        """Closes the journal, removing it once its data is safely exported."""
+        self.file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def rotate_journal(path: str) -> str | None:
+    """Moves a non-empty journal aside with the current time in its name."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+
+    stem, ext = os.path.splitext(path)
+    rotated_path = f"{stem}_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}{ext}"
+    os.replace(path, rotated_path)
+    logger.warning(
+        f"{path} holds an interrupted scrape that was not resumed. Moved it to {rotated_path}; move it back and pass --resume to continue it."
+    )
+    return rotated_path
+
+
+def load_journal(
+    path: str, upgrade: Callable[[Any], Any] | None = None
+) -> dict[tuple, Any]:
+    """Loads the completed units of a journal, upgrading records that only hold entries."""
+    completed = {}
+    skipped = 0
+
+    if not os.path.exists(path):
+        logger.warning(f"No journal to resume from at {path}.")
+        return completed
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave the last line partially written
+                logger.warning(f"Skipping incomplete journal record in {path}.")
+                continue
+
+            if "data" in record:
+                completed[tuple(record["unit"])] = record["data"]
+            elif "entries" in record and upgrade:
+                completed[tuple(record["unit"])] = upgrade(record["entries"])
+            else:
+                skipped += 1
+
+    if skipped:
+        logger.warning(
+            f"Skipping {skipped} journal records of an older format in {path}. Their units will be scraped again."
+        )
+
+    return completed
@@ -0,0 +1,219 @@
+import json
+import os
+import re
+from typing import Iterable, Iterator, TextIO
+from utils.logger import logger
+
+
+READ_SIZE = 1 << 16
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class JSONEntriesWriter:
+    """Writes a `{meta, entries}` document as soon as entries are collected.
+
+    Supports the `append`, `extend` and `len` operations used on in-memory
+    data stores, so it can be passed wherever a list of entries is expected.
+    The output is identical to `json.dump(..., indent=2, ensure_ascii=False)`.
+    """
+
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self.count = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+        _write_header(self.file, meta)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, entry: dict) -> None:
+        # A single write, so an interruption never leaves a dangling separator
+        self.file.write(_format_entry(entry, self.count))
+        self.count += 1
+
+    def extend(self, entries: Iterable[dict]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def close(self, output_path: str) -> bool:
+        """Finishes the document and moves it to its final path."""
+        try:
+            _write_footer(self.file, self.count)
+            self.file.close()
+            os.replace(self.path, output_path)
+            logger.info(f"Data successfully exported to {output_path}")
+            return True
+        except (IOError, ValueError) as e:
+            logger.error(f"Failed to export data: {e}")
+            return False
+
+    def discard(self) -> None:
+        """Closes and removes the unfinished document."""
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def write_entries_json(file: TextIO, meta: dict, entries: Iterable[dict]) -> int:
+    """Writes a `{meta, entries}` document one entry at a time, returning the entry count.
+
+    The output is identical to `json.dump(..., indent=2, ensure_ascii=False)`.
+    """
+    _write_header(file, meta)
+
+    count = 0
+    for entry in entries:
+        file.write(_format_entry(entry, count))
+        count += 1
+
+    _write_footer(file, count)
+    return count
+
+
+def read_entries_json(file: TextIO) -> tuple[dict, Iterator[dict]]:
+    """Reads the meta of a `{meta, entries}` document and returns it with a lazy iterator over its entries.
+
+    Only one entry is decoded at a time. Documents with the meta after the
+    entries are loaded whole.
+    """
+    reader = _JSONReader(file)
+    reader.expect("{")
+
+    meta = None
+    while (key := reader.next_key()) is not None and key != "entries":
+        value = reader.decode()
+        if key == "meta":
+            meta = value
+
+    if key is None:
+        raise KeyError("entries")
+    if meta is None:
+        file.seek(0)
+        data = json.load(file)
+        return data["meta"], iter(data["entries"])
+
+    def iter_entries() -> Iterator[dict]:
+        reader.expect("[")
+        if not reader.consume("]"):
+            yield reader.decode()
+            while not reader.consume("]"):
+                reader.expect(",")
+                yield reader.decode()
+
+        # Decode the rest so a truncated document still fails
+        while reader.next_key() is not None:
+            reader.decode()
+
+    return meta, iter_entries()
+
+
+def iter_entries_json(path: str) -> tuple[dict, Iterator[dict]]:
+    """Opens a `{meta, entries}` file, returning its meta and a lazy iterator over its entries.
+
+    The file is closed once the entries are exhausted.
+    """
+    file = open(path, "r", encoding="utf-8")
+    try:
+        meta, entries = read_entries_json(file)
+    except Exception:
+        file.close()
+        raise
+
+    def iter_entries() -> Iterator[dict]:
+        with file:
+            yield from entries
+
+    return meta, iter_entries()
+
+
+class _JSONReader:
+    """Decodes the values of a JSON document from a file in buffered reads."""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.members = 0
+
+    def read(self) -> None:
+        # Read at least as much as is buffered so large values decode in few retries
+        remaining = self.buffer[self.pos :]
+        chunk = self.file.read(max(READ_SIZE, len(remaining)))
+        self.buffer = remaining + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def skip_whitespace(self) -> None:
+        while True:
+            self.pos = WHITESPACE_PATTERN.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return
+            self.read()
+
+    def consume(self, char: str) -> bool:
+        self.skip_whitespace()
+        if self.buffer.startswith(char, self.pos):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char: str) -> None:
+        if not self.consume(char):
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+
+    def decode(self):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut by the end of the buffer may continue in the next read
+                if self.eof or not (
+                    type(value) in (int, float)
+                    and (end == len(self.buffer) or self.buffer[end] in NUMBER_CHARS)
+                ):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read()
+
+    def next_key(self) -> str | None:
+        """Reads the next key of the top-level object, or None at its end."""
+        if self.consume("}"):
+            return None
+        if self.members:
+            self.expect(",")
+        key = self.decode()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", self.buffer, self.pos)
+        self.expect(":")
+        self.members += 1
+        return key
+
+
+def _write_header(file: TextIO, meta: dict) -> None:
+    file.write('{\n  "meta": ')
+    file.write(_dumps_indented(meta, 1))
+    file.write(',\n  "entries": [')
+
+
+def _format_entry(entry: dict, index: int) -> str:
+    return (",\n    " if index else "\n    ") + _dumps_indented(entry, 2)
+
+
+def _write_footer(file: TextIO, count: int) -> None:
+    file.write("\n  ]\n}" if count else "]\n}")
+
+
+def _dumps_indented(value, level: int) -> str:
+    """Serializes a value as if it was nested `level` deep in an indented document."""
+    # Encoded strings never contain raw newlines, so every newline is a line break
+    return json.dumps(value, indent=2, ensure_ascii=False).replace(
+        "\n", "\n" + "  " * level
+    )
@@ -1,3 +1,4 @@
+import argparse
 import logging
 
 
@@ -6,3 +7,21 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger()
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+def add_log_arguments(argparser: argparse.ArgumentParser) -> None:
+    """Adds the log verbosity option to a command line parser."""
+    argparser.add_argument(
+        "--log-level",
+        type=str.upper,
+        choices=LOG_LEVELS,
+        default="INFO",
+        help="Log verbosity. Use DEBUG to log every processed entry. Defaults to INFO.",
+    )
+
+
+def configure_logging_from_args(args: argparse.Namespace) -> None:
+    """Sets the log verbosity from parsed command line arguments."""
+    logger.setLevel(args.log_level)
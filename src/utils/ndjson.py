@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import sys
+from utils.json_stream import write_entries_json
+from utils.logger import logger
+
+
+class NDJSONWriter:
+    """Writes entries to a newline-delimited JSON file as soon as they are collected.
+
+    Supports the `append`, `extend` and `len` operations used on in-memory
+    data stores, so it can be passed wherever a list of entries is expected.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def extend(self, entries) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def close(self, output_path: str, meta: dict) -> bool:
+        """Moves the written entries to their final path next to a meta sidecar."""
+        try:
+            self.file.close()
+            os.replace(self.path, output_path)
+            with open(get_meta_path(output_path), "w", encoding="utf-8") as file:
+                json.dump(meta, file, indent=2, ensure_ascii=False)
+            logger.info(f"Data successfully exported to:\n{output_path}")
+            return True
+        except IOError as e:
+            logger.error(f"Failed to export data: {e}")
+            return False
+
+    def discard(self) -> None:
+        """Closes and removes the unfinished file."""
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def main():
+    # Parse arguments
+    argparser = argparse.ArgumentParser(
+        description="Convert a newline-delimited JSON file and its meta sidecar to a JSON file."
+    )
+    argparser.add_argument("input_file", help="Path to the input `.ndjson` file.")
+    argparser.add_argument(
+        "output_file",
+        nargs="?",
+        help="Path to the output JSON file. Defaults to the input path with a `.json` extension.",
+    )
+    args = argparser.parse_args()
+
+    output_path = args.output_file or os.path.splitext(args.input_file)[0] + ".json"
+
+    if not convert_to_json(args.input_file, output_path):
+        sys.exit(1)
+
+
+def convert_to_json(input_path: str, output_path: str) -> bool:
+    """Converts a newline-delimited JSON file to the `{meta, entries}` layout."""
+    try:
+        with open(get_meta_path(input_path), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+
+        with open(input_path, "r", encoding="utf-8") as in_file, open(
+            output_path, "w", encoding="utf-8"
+        ) as out_file:
+            count = write_entries_json(out_file, meta, iter_ndjson(in_file))
+
+        logger.info(f"Converted {count} entries to {output_path}")
+        return True
+    except (IOError, ValueError) as e:
+        logger.error(f"Failed to convert {input_path}: {e}")
+        return False
+
+
+def iter_ndjson(file):
+    """Iterates over the entries of a newline-delimited JSON file."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def get_meta_path(path: str) -> str:
+    """Gets the path of the meta sidecar of a newline-delimited JSON file."""
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import os
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+from utils.build_cache import BuildCache
+from utils.logger import logger
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Chunks are pickled as a whole, so they should be large enough to amortize that
+MIN_CHUNK_SIZE = 64
+MAX_CHUNK_SIZE = 2000
+CHUNKS_PER_WORKER = 4
+IN_FLIGHT_PER_WORKER = 2
+
+
+def add_worker_arguments(
+    argparser: argparse.ArgumentParser,
+    default_workers: int = 1,
+    chunk_unit: str | None = "Entries",
+) -> None:
+    """Adds the parallel processing options to a command line parser.
+
+    The chunk size option is left out if no chunk unit is given.
+    """
+    argparser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers,
+        help=f"Number of worker processes. Use 0 for one per available CPU. Defaults to {default_workers}.",
+    )
+    if not chunk_unit:
+        return
+    argparser.add_argument(
+        "--chunk-size",
+        type=int,
+        help=f"{chunk_unit} sent to a worker at a time. Defaults to a size based on the input.",
+    )
+
+
+def get_workers(workers: int) -> int:
+    """Resolves a worker count, where 0 means one per available CPU."""
+    if workers > 0:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_chunk_size(total: int, workers: int) -> int:
+    """Gets a chunk size that gives each worker a few chunks to balance the load."""
+    size = total // (workers * CHUNKS_PER_WORKER)
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size))
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Splits items into lists of a given size."""
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def map_chunked(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    chunk_size: int | None = None,
+    cache: BuildCache | None = None,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+) -> Iterator[R]:
+    """Maps a function over items in worker processes, yielding results in order.
+
+    The function must be picklable (defined at module level). Only a few chunks
+    per worker are in flight at a time, so the items can be a lazy iterable.
+    With a build cache, chunks mapped by an earlier run are not mapped again,
+    so the items and results must be JSON-serializable. An initializer is
+    called once in each worker, or in this process without workers, to pass
+    data shared by all items only once.
+    """
+    workers = get_workers(workers)
+    if workers == 1 and initializer:
+        initializer(*initargs)
+    if workers == 1 and cache is None:
+        yield from map(func, items)
+        return
+
+    if cache is not None:
+        chunks = cache.split(items, chunk_size) if chunk_size else cache.split(items)
+    else:
+        if not chunk_size:
+            chunk_size = (
+                get_chunk_size(len(items), workers)
+                if hasattr(items, "__len__")
+                else MAX_CHUNK_SIZE
+            )
+        chunks = ((None, chunk) for chunk in batched(items, chunk_size))
+
+    executor = (
+        ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(logger.level, initializer, initargs),
+        )
+        if workers > 1
+        else None
+    )
+    # Keys of the chunks and their results, or futures of the results
+    pending = deque()
+    try:
+        for key, chunk in chunks:
+            if key is not None and (results := cache.load(key)) is not None:
+                pending.append((None, results))
+            elif executor:
+                pending.append((key, executor.submit(_map_chunk, func, chunk)))
+            else:
+                pending.append((key, _map_chunk(func, chunk)))
+
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                yield from _pop_results(pending, cache)
+        while pending:
+            yield from _pop_results(pending, cache)
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _pop_results(pending: deque, cache: BuildCache | None) -> list:
+    """Gets the results of the oldest pending chunk, storing new ones in the cache."""
+    key, results = pending.popleft()
+    if not isinstance(results, list):
+        results = results.result()
+    if key is not None:
+        cache.save(key, results)
+    return results
+
+
+def _map_chunk(func: Callable[[T], R], chunk: list[T]) -> list[R]:
+    """Maps a function over a chunk in a worker process."""
+    return [func(item) for item in chunk]
+
+
+def _init_worker(
+    log_level: int,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+) -> None:
+    """Leaves interruption to the parent process, which saves the results."""
+    logger.setLevel(log_level)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if initializer:
+        initializer(*initargs)
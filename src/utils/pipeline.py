@@ -0,0 +1,475 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable
+from utils.build_cache import get_code_version, hash_file
+from utils.graceful_exit import on_exit
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
+from utils.parallel import get_workers
+
+# Stages run as modules from the source directory, and their paths are relative to it
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+STATE_PATH = os.path.join(SRC_DIR, "build_cache", "pipeline.json")
+STATE_VERSION = 1
+
+GCIDE_DIR = "dictionaries/gcide/downloaded_data/gcide_xml-0.53"
+SCRAPE_PREFIX = "scrape:"
+# Shared modules that every stage may import, hashed into every stage's key
+UTILS_PATTERN = "utils/*.py"
+# Per-file parse stages are small and run in parallel, so they use one worker each.
+# The GCIDE parser is the largest stage and keeps its default of one per CPU.
+PER_FILE_PARSE_ARGS = ["--workers", "1"]
+
+
+class Stage:
+    """A script run on declared inputs to make declared outputs.
+
+    Inputs and outputs are glob patterns relative to `src/`. A stage runs after
+    the stages it depends on, and only if the content of its inputs, its
+    arguments or its script changed since its last run, or if one of its
+    outputs was changed or removed. Stages that always run have no inputs to
+    compare, like scrapers. Stages made for one input file have their outputs
+    removed once the file is deleted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        args: Iterable[str] = (),
+        inputs: Iterable[str] = (),
+        outputs: Iterable[str] = (),
+        deps: Iterable[str] = (),
+        always: bool = False,
+        per_file: bool = False,
+    ):
+        self.name = name
+        self.module = module
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.always = always
+        self.per_file = per_file
+
+    def get_command(self) -> list[str]:
+        return [sys.executable, "-m", self.module, *self.args]
+
+    def get_key(self, input_digests: dict[str, str]) -> str:
+        """Gets a key that changes with the stage's code, arguments and input contents.
+
+        The code is the stage's script and the shared `utils` modules, except
+        the pipeline itself.
+        """
+        script_path = os.path.join(SRC_DIR, *self.module.split(".")) + ".py"
+        code_paths = [
+            os.path.join(SRC_DIR, path)
+            for path in expand([UTILS_PATTERN])
+            if os.path.join(SRC_DIR, path) != os.path.realpath(__file__)
+        ]
+        hasher = hashlib.sha256(
+            json.dumps(
+                [self.module, self.args, get_code_version(script_path, *code_paths)]
+            ).encode()
+        )
+        for path, digest in input_digests.items():
+            hasher.update(f"{path}\0{digest}\0".encode())
+        return hasher.hexdigest()
+
+
+class PipelineState:
+    """Keys and outputs of the last successful run of each stage.
+
+    Digests of files are kept with their size and modification time, so
+    unchanged files are not read again.
+    """
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.stages: dict[str, dict] = {}
+        self.files: dict[str, list] = {}
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("version") == STATE_VERSION:
+                self.stages = state["stages"]
+                self.files = state["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def hash_files(self, paths: Iterable[str]) -> dict[str, str]:
+        """Gets the content digests of files relative to `src/`."""
+        digests = {}
+        for path in paths:
+            full_path = os.path.join(SRC_DIR, path)
+            stat = os.stat(full_path)
+            cached = self.files.get(path)
+            if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+                digests[path] = cached[2]
+                continue
+            digest = hash_file(full_path).hex()
+            self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+            digests[path] = digest
+        return digests
+
+    def is_up_to_date(self, stage: Stage, key: str) -> bool:
+        """Checks if a stage ran with the same key and its outputs are unchanged."""
+        record = self.stages.get(stage.name)
+        if stage.always or not record or record["key"] != key:
+            return False
+        try:
+            return self.hash_files(record["outputs"]) == record["outputs"]
+        except OSError:
+            return False
+
+    def record(self, stage: Stage, key: str) -> None:
+        """Records a successful run of a stage with the outputs it left."""
+        outputs = self.hash_files(expand(stage.outputs))
+        if not outputs:
+            logger.warning(f"Stage {stage.name} made no outputs.")
+        self.stages[stage.name] = {"key": key, "outputs": outputs}
+        if stage.per_file:
+            self.stages[stage.name]["input"] = stage.inputs[0]
+
+    def remove_orphans(self, stages: dict[str, Stage], dry_run: bool = False) -> None:
+        """Removes the outputs of per-file stages whose input file was deleted.
+
+        Other stages that are no longer found, like a parser whose downloaded
+        data was moved away, keep their outputs.
+        """
+        for name, record in list(self.stages.items()):
+            input_path = record.get("input")
+            if (
+                name in stages
+                or not input_path
+                or os.path.exists(os.path.join(SRC_DIR, input_path))
+            ):
+                continue
+
+            for path in record["outputs"]:
+                full_path = os.path.join(SRC_DIR, path)
+                if not os.path.exists(full_path):
+                    continue
+                if dry_run:
+                    logger.info(
+                        f"Would remove {path}, made from the deleted {input_path}."
+                    )
+                else:
+                    logger.info(f"Removing {path}, made from the deleted {input_path}.")
+                    os.remove(full_path)
+            if not dry_run:
+                del self.stages[name]
+
+    def save(self) -> None:
+        self.files = {
+            path: cached
+            for path, cached in self.files.items()
+            if os.path.exists(os.path.join(SRC_DIR, path))
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".part", "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": STATE_VERSION, "stages": self.stages, "files": self.files},
+                file,
+                ensure_ascii=False,
+            )
+        os.replace(self.path + ".part", self.path)
+
+
+def main():
+    # Parse arguments
+    argparser = argparse.ArgumentParser(
+        description="Run the data pipeline, rebuilding only the stages whose inputs, arguments or scripts changed."
+    )
+    argparser.add_argument(
+        "targets",
+        nargs="*",
+        help="Stages to bring up to date with the stages they depend on, by name or prefix (e.g. 'wordlists', 'parse:pinoy_dictionary'). Defaults to all stages.",
+    )
+    argparser.add_argument(
+        "--scrape",
+        action="store_true",
+        help="Scrape every source again before the other stages. Scraping is left out otherwise.",
+    )
+    argparser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the selected stages even if they are up to date.",
+    )
+    argparser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only log which stages would run.",
+    )
+    argparser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of stages run at a time. Use 0 for one per available CPU. Defaults to 0.",
+    )
+    add_log_arguments(argparser)
+    args = argparser.parse_args()
+    configure_logging_from_args(args)
+
+    state = PipelineState()
+
+    # Handle graceful exit
+    on_exit(
+        lambda: state.save(),
+        message="Process interrupted. Saving pipeline state...",
+    )
+
+    # Scraped files decide which parse stages there are, so scraping runs first
+    if args.scrape:
+        scrape_stages = {
+            name: stage
+            for name, stage in discover_stages().items()
+            if name.startswith(SCRAPE_PREFIX)
+        }
+        if not run_stages(scrape_stages, state, args.jobs, args.force, args.dry_run):
+            sys.exit(1)
+
+    stages = discover_stages()
+    state.remove_orphans(stages, args.dry_run)
+
+    try:
+        selected = select_stages(
+            {
+                name: stage
+                for name, stage in stages.items()
+                if not name.startswith(SCRAPE_PREFIX)
+            },
+            args.targets,
+        )
+    except ValueError as e:
+        argparser.error(str(e))
+
+    if not run_stages(selected, state, args.jobs, args.force, args.dry_run):
+        sys.exit(1)
+
+
+def discover_stages() -> dict[str, Stage]:
+    """Gets the stages of the pipeline for the downloaded and scraped files on disk.
+
+    Parse stages are made per input file, so different sources and languages
+    are parsed in parallel and only changed files are parsed again.
+    """
+    stages = [
+        Stage(
+            "scrape:pinoy_dictionary",
+            "dictionaries.pinoy_dictionary.scraper",
+            ["--all-langs"],
+            outputs=["dictionaries/pinoy_dictionary/scraped/*.json"],
+            always=True,
+        ),
+        Stage(
+            "scrape:wikivoyage",
+            "phrasebooks.wikivoyage.scraper",
+            ["--all-langs"],
+            outputs=["phrasebooks/wikivoyage/scraped/*.json"],
+            always=True,
+        ),
+    ]
+
+    dictionary_stages = []
+    if os.path.isdir(os.path.join(SRC_DIR, GCIDE_DIR)):
+        output_path = "dictionaries/gcide/parsed/dictionary_eng_eng.json"
+        dictionary_stages.append(
+            Stage(
+                "parse:gcide",
+                "dictionaries.gcide.parser",
+                [GCIDE_DIR, "--output-file", output_path],
+                inputs=[f"{GCIDE_DIR}/**/*"],
+                outputs=[output_path],
+            )
+        )
+    for input_path in expand(["dictionaries/pinoy_dictionary/scraped/*.json"]):
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        output_path = f"dictionaries/pinoy_dictionary/parsed/{name}_parsed.json"
+        dictionary_stages.append(
+            Stage(
+                f"parse:pinoy_dictionary:{name}",
+                "dictionaries.pinoy_dictionary.parser",
+                [input_path, "--output-file", output_path, *PER_FILE_PARSE_ARGS],
+                inputs=[input_path],
+                outputs=[output_path],
+                per_file=True,
+            )
+        )
+    stages.extend(dictionary_stages)
+
+    for input_path in expand(["phrasebooks/wikivoyage/scraped/*.json"]):
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        output_path = f"phrasebooks/wikivoyage/parsed/phrases_{name.removeprefix('phrasebook_')}_parsed.json"
+        stages.append(
+            Stage(
+                f"parse:wikivoyage:{name}",
+                "phrasebooks.wikivoyage.parser",
+                [input_path, "--output-file", output_path, *PER_FILE_PARSE_ARGS],
+                inputs=[input_path],
+                outputs=[output_path],
+                per_file=True,
+            )
+        )
+
+    stages.append(
+        Stage(
+            "wordlists",
+            "wordlists.generate_wordlists",
+            inputs=["dictionaries/*/parsed/*.json"],
+            outputs=["wordlists/parsed/wordlist_*.txt"],
+            deps=[stage.name for stage in dictionary_stages],
+        )
+    )
+    stages.append(
+        Stage(
+            "freqlists",
+            "freqlists.generate_freqlists",
+            inputs=["wordlists/parsed/*.txt", "freqlists/downloaded_data/leipzig/*"],
+            outputs=["freqlists/parsed/freqlist_*"],
+            deps=["wordlists"],
+        )
+    )
+
+    return {stage.name: stage for stage in stages}
+
+
+def select_stages(stages: dict[str, Stage], targets: list[str]) -> dict[str, Stage]:
+    """Selects the target stages and the stages they depend on, in pipeline order."""
+    if not targets:
+        return stages
+
+    selected = set()
+    pending = []
+    for target in targets:
+        matches = [
+            name for name in stages if name == target or name.startswith(f"{target}:")
+        ]
+        if not matches:
+            raise ValueError(f"Unknown stage: {target}")
+        pending.extend(matches)
+
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dep for dep in stages[name].deps if dep in stages)
+
+    return {name: stage for name, stage in stages.items() if name in selected}
+
+
+def run_stages(
+    stages: dict[str, Stage],
+    state: PipelineState,
+    jobs: int = 0,
+    force: bool = False,
+    dry_run: bool = False,
+) -> bool:
+    """Runs the out-of-date stages, each as soon as the stages it depends on are done.
+
+    Inputs are compared when a stage is ready to run, so a stage whose
+    dependencies ran again but made the same outputs is still up to date.
+    """
+    pending = dict(stages)
+    # Whether each finished stage succeeded
+    results: dict[str, bool] = {}
+    # Stages that would run in a dry run, whose dependents would run too
+    outdated = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=get_workers(jobs)) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                deps = [dep for dep in stage.deps if dep in stages]
+                if any(dep not in results for dep in deps):
+                    continue
+                del pending[name]
+
+                if not all(results[dep] for dep in deps):
+                    logger.warning(f"Skipping {name}: a stage it depends on failed.")
+                    results[name] = False
+                    continue
+
+                try:
+                    key = stage.get_key(state.hash_files(expand(stage.inputs)))
+                except OSError as e:
+                    logger.error(f"Failed to read the inputs of {name}: {e}")
+                    results[name] = False
+                    continue
+
+                if (
+                    not force
+                    and not outdated.intersection(deps)
+                    and state.is_up_to_date(stage, key)
+                ):
+                    logger.info(f"{name} is up to date.")
+                    results[name] = True
+                elif dry_run:
+                    logger.info(f"Would run {name}: {' '.join(stage.get_command())}")
+                    outdated.add(name)
+                    results[name] = True
+                else:
+                    logger.info(f"Running {name}...")
+                    running[executor.submit(run_command, stage.get_command())] = (
+                        stage,
+                        key,
+                    )
+
+            if not running:
+                if pending:
+                    raise ValueError(
+                        f"Stages depend on each other: {', '.join(pending)}"
+                    )
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key = running.pop(future)
+                results[stage.name] = future.result()
+                if results[stage.name]:
+                    state.record(stage, key)
+                    logger.info(f"Finished {stage.name}.")
+                else:
+                    state.stages.pop(stage.name, None)
+                    logger.error(f"Stage {stage.name} failed.")
+            state.save()
+
+    failed = [name for name, success in results.items() if not success]
+    if failed:
+        logger.error(
+            f"{len(failed)} stages failed or were skipped: {', '.join(failed)}"
+        )
+    return not failed
+
+
+def run_command(command: list[str]) -> bool:
+    """Runs a stage's command from the source directory."""
+    try:
+        return subprocess.run(command, cwd=SRC_DIR).returncode == 0
+    except OSError as e:
+        logger.error(f"Failed to run {' '.join(command)}: {e}")
+        return False
+
+
+def expand(patterns: Iterable[str]) -> list[str]:
+    """Gets the files matching glob patterns relative to `src/`, in sorted order.
+
+    Hidden files, like the temporary files of running stages, are not matched.
+    """
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, root_dir=SRC_DIR, recursive=True):
+            if os.path.isfile(os.path.join(SRC_DIR, path)):
+                paths.add(path)
+    return sorted(paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+from utils.logger import logger
+
+
+DEFAULT_INTERVAL = 5
+# How often the clock is checked, so updates in hot loops stay a counter increment
+CHECK_PERIOD = 0.1
+
+
+class Progress:
+    """Logs the rate and ETA of a long-running loop at most once per interval."""
+
+    def __init__(
+        self,
+        label: str,
+        total: int | None = None,
+        unit: str = "entries",
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.count = 0
+        self.start = self.last_log = time.monotonic()
+        self.next_check = 1
+
+    def update(self, n: int = 1) -> None:
+        self.count += n
+        if self.count < self.next_check:
+            return
+
+        now = time.monotonic()
+        elapsed = now - self.start
+        # Sample the clock about once per check period at the current rate
+        step = int(self.count / elapsed * CHECK_PERIOD) if elapsed else 1
+        self.next_check = self.count + max(1, step)
+
+        if now - self.last_log >= self.interval:
+            self.last_log = now
+            self.log(elapsed)
+
+    def log(self, elapsed: float) -> None:
+        rate = self.count / elapsed if elapsed else 0.0
+        if self.total and rate:
+            eta = timedelta(seconds=round(max(0, self.total - self.count) / rate))
+            logger.info(
+                "%s: %d/%d %s (%.0f%%), %.0f %s/s, ETA %s",
+                self.label,
+                self.count,
+                self.total,
+                self.unit,
+                100 * self.count / self.total,
+                rate,
+                self.unit,
+                eta,
+            )
+        else:
+            logger.info(
+                "%s: %d %s, %.0f %s/s",
+                self.label,
+                self.count,
+                self.unit,
+                rate,
+                self.unit,
+            )
+
+    def close(self) -> None:
+        """Logs the final count and average rate."""
+        elapsed = time.monotonic() - self.start
+        rate = self.count / elapsed if elapsed else 0.0
+        logger.info(
+            "%s: %d %s in %s, %.0f %s/s",
+            self.label,
+            self.count,
+            self.unit,
+            timedelta(seconds=round(elapsed)),
+            rate,
+            self.unit,
+        )
@@ -0,0 +1,168 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from utils.logger import logger
+
+
+DEFAULT_MAX_RATE = 5.0  # Requests per second per host
+MIN_RATE = 0.1
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+THROTTLE_STATUSES = {429, 503}
+
+_buckets: dict[str, "TokenBucket"] = {}
+_buckets_lock = threading.Lock()
+_max_rate = DEFAULT_MAX_RATE
+
+
+class TokenBucket:
+    """Per-host request rate that backs off when throttled and slowly recovers."""
+
+    def __init__(self, max_rate: float):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.capacity = max(max_rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "retry_after_seconds": 0.0,
+            "waited_seconds": 0.0,
+        }
+
+    def reserve(self) -> float:
+        """Takes a token, returning how many seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+            # Tokens can go negative, which queues requests behind each other
+            self.tokens -= 1
+            delay = max(-self.tokens / self.rate, self.blocked_until - now, 0.0)
+
+            self.stats["requests"] += 1
+            self.stats["waited_seconds"] += delay
+            return delay
+
+    def on_success(self) -> None:
+        """Recovers the rate additively after a successful request."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttled(self, retry_after: float | None) -> None:
+        """Halves the rate and pauses the host for as long as it asked."""
+        with self.lock:
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.stats["throttled"] += 1
+
+            if retry_after:
+                self.blocked_until = max(
+                    self.blocked_until, time.monotonic() + retry_after
+                )
+                self.stats["retry_after_seconds"] += retry_after
+
+
+def add_rate_limit_arguments(argparser: argparse.ArgumentParser) -> None:
+    """Adds the rate limit options to a command line parser."""
+    argparser.add_argument(
+        "--max-rate",
+        type=float,
+        default=DEFAULT_MAX_RATE,
+        help=f"Maximum requests per second per host. Defaults to {DEFAULT_MAX_RATE:g}.",
+    )
+
+
+def configure_rate_limit(max_rate: float) -> None:
+    """Sets the maximum request rate of hosts without a bucket yet."""
+    global _max_rate
+
+    if max_rate <= 0:
+        raise ValueError("Maximum rate must be positive.")
+
+    _max_rate = max_rate
+
+
+def get_bucket(url: str) -> TokenBucket:
+    """Gets the token bucket of the host of a url."""
+    host = urlsplit(url).netloc
+
+    with _buckets_lock:
+        if (bucket := _buckets.get(host)) is None:
+            bucket = _buckets[host] = TokenBucket(_max_rate)
+
+    return bucket
+
+
+def record_response(url: str, status_code: int, headers) -> float | None:
+    """Adapts the rate of a host to a response, returning its Retry-After delay."""
+    bucket = get_bucket(url)
+
+    if status_code in THROTTLE_STATUSES:
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        bucket.on_throttled(retry_after)
+        return retry_after
+
+    if status_code < 400:
+        bucket.on_success()
+
+    return None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parses a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_backoff_delay(attempt: int) -> float:
+    """Gets a jittered exponential backoff delay.
+
+    Retry-After is not added here, as `record_response` already pauses the
+    host's bucket for it and `reserve` waits out the rest.
+    """
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2**attempt))
+
+
+def get_throttle_stats() -> dict[str, dict]:
+    """Gets the request, throttling and waiting counts per host."""
+    with _buckets_lock:
+        buckets = list(_buckets.items())
+
+    stats = {}
+    for host, bucket in buckets:
+        with bucket.lock:
+            stats[host] = {
+                **bucket.stats,
+                "rate": round(bucket.rate, 3),
+                "max_rate": bucket.max_rate,
+            }
+
+    return stats
+
+
+def log_throttle_stats() -> None:
+    """Logs the throttling stats as JSON."""
+    if stats := get_throttle_stats():
+        logger.info(f"Throttling stats: {json.dumps(stats)}")
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+from utils.http_session import set_pool_maxsize
+
+
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_MAX_TOTAL = 8
+
+
+class Scheduler:
+    """Shares a global request budget between hosts while limiting each host."""
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        max_total: int = DEFAULT_MAX_TOTAL,
+    ):
+        if max_per_host < 1 or max_total < 1:
+            raise ValueError("Concurrency limits must be positive integers.")
+
+        self.max_per_host = max_per_host
+        self.max_total = max_total
+        self.total = asyncio.Semaphore(max_total)
+        self.hosts: dict[str, asyncio.Semaphore] = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """Waits until a request to the host of a url is allowed."""
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = asyncio.Semaphore(self.max_per_host)
+
+        # Take the host slot first so waiting on a busy host keeps no global slot
+        async with self.hosts[host]:
+            async with self.total:
+                yield
+
+
+def add_scheduler_arguments(
+    argparser: argparse.ArgumentParser,
+    max_per_host: int = DEFAULT_MAX_PER_HOST,
+    max_total: int = DEFAULT_MAX_TOTAL,
+) -> None:
+    """Adds the concurrency limit options to a command line parser."""
+    argparser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=max_per_host,
+        help=f"Maximum concurrent requests per host. Defaults to {max_per_host}.",
+    )
+    argparser.add_argument(
+        "--max-total",
+        type=int,
+        default=max_total,
+        help=f"Maximum concurrent requests across all hosts. Defaults to {max_total}.",
+    )
+
+
+def run_scheduled(
+    main: Callable[[Scheduler], Awaitable], max_per_host: int, max_total: int
+):
+    """Runs a coroutine function with a shared scheduler in a new event loop."""
+
+    async def runner():
+        # Requests run in worker threads, so size the pool to the global budget
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=max_total)
+        )
+        set_pool_maxsize(max_per_host)
+
+        return await main(Scheduler(max_per_host, max_total))
+
+    return asyncio.run(runner())
@@ -0,0 +1,323 @@
+import argparse
+import json
+import sqlite3
+import sys
+from typing import Iterable
+from utils.json_stream import iter_entries_json
+from utils.logger import logger
+
+
+# Entries inserted with one `executemany` per table
+BATCH_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    lang TEXT NOT NULL,
+    definition_lang TEXT NOT NULL,
+    source_title TEXT,
+    source_link TEXT,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    dictionary_id INTEGER NOT NULL REFERENCES dictionaries (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    source_title TEXT,
+    source_link TEXT
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    id INTEGER PRIMARY KEY,
+    word_id INTEGER NOT NULL REFERENCES words (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    description TEXT,
+    pos TEXT,
+    origin TEXT,
+    usage_note TEXT,
+    source_title TEXT,
+    source_link TEXT
+);
+CREATE TABLE IF NOT EXISTS definition_lists (
+    definition_id INTEGER NOT NULL REFERENCES definitions (id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phrasebooks (
+    id INTEGER PRIMARY KEY,
+    lang TEXT NOT NULL,
+    translation_lang TEXT NOT NULL,
+    source_title TEXT,
+    source_link TEXT,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phrases (
+    id INTEGER PRIMARY KEY,
+    phrasebook_id INTEGER NOT NULL REFERENCES phrasebooks (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phrase TEXT NOT NULL,
+    usage_note TEXT,
+    source_title TEXT,
+    source_link TEXT
+);
+CREATE TABLE IF NOT EXISTS phrase_lists (
+    phrase_id INTEGER NOT NULL REFERENCES phrases (id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS translations (
+    id INTEGER PRIMARY KEY,
+    phrase_id INTEGER NOT NULL REFERENCES phrases (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    content TEXT,
+    source_title TEXT,
+    source_link TEXT
+);
+CREATE TABLE IF NOT EXISTS translation_lists (
+    translation_id INTEGER NOT NULL REFERENCES translations (id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+"""
+
+# Created after the inserts, which is faster than updating them row by row
+INDEXES = """
+CREATE INDEX IF NOT EXISTS dictionaries_lang ON dictionaries (lang, definition_lang);
+CREATE INDEX IF NOT EXISTS words_word ON words (word COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS words_dictionary_id ON words (dictionary_id);
+CREATE INDEX IF NOT EXISTS definitions_word_id ON definitions (word_id);
+CREATE INDEX IF NOT EXISTS definition_lists_definition_id ON definition_lists (definition_id);
+CREATE INDEX IF NOT EXISTS phrasebooks_lang ON phrasebooks (lang, translation_lang);
+CREATE INDEX IF NOT EXISTS phrases_phrase ON phrases (phrase COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS phrases_phrasebook_id ON phrases (phrasebook_id);
+CREATE INDEX IF NOT EXISTS phrase_lists_phrase_id ON phrase_lists (phrase_id);
+CREATE INDEX IF NOT EXISTS translations_phrase_id ON translations (phrase_id);
+CREATE INDEX IF NOT EXISTS translation_lists_translation_id ON translation_lists (translation_id);
+"""
+
+# Full-text indexes over the text of the definitions and translation tables
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS definitions_fts USING fts5 (
+    description, content = 'definitions', content_rowid = 'id'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS translations_fts USING fts5 (
+    content, content = 'translations', content_rowid = 'id'
+);
+"""
+FTS_TABLES = ("definitions_fts", "translations_fts")
+
+# Tables and fields of each kind of file, found by the second language key of the meta
+LAYOUTS = {
+    "definition_lang": {
+        "tables": ("dictionaries", "words", "definitions"),
+        "keys": ("dictionary_id", "word_id", "definition_id"),
+        "list_tables": (None, "definition_lists"),
+        "entry_columns": ("word", "source_title", "source_link"),
+        "entry_lists": (),
+        "items_key": "definitions",
+        "item_columns": (
+            "description",
+            "pos",
+            "origin",
+            "usage_note",
+            "source_title",
+            "source_link",
+        ),
+        "item_lists": ("synonyms", "antonyms", "inflections", "examples"),
+    },
+    "translation_lang": {
+        "tables": ("phrasebooks", "phrases", "translations"),
+        "keys": ("phrasebook_id", "phrase_id", "translation_id"),
+        "list_tables": ("phrase_lists", "translation_lists"),
+        "entry_columns": ("phrase", "usage_note", "source_title", "source_link"),
+        "entry_lists": ("categories",),
+        "items_key": "translations",
+        "item_columns": ("content", "source_title", "source_link"),
+        "item_lists": ("examples",),
+    },
+}
+
+
+def main():
+    # Parse arguments
+    argparser = argparse.ArgumentParser(
+        description="Export JSON dictionaries and phrasebooks to a SQLite database with full-text indexes."
+    )
+    argparser.add_argument("database", help="Path to the SQLite database.")
+    argparser.add_argument(
+        "input_files",
+        nargs="+",
+        help="Paths to the JSON files. A file replaces an earlier export with the same languages and source title.",
+    )
+    args = argparser.parse_args()
+
+    if not export_to_sqlite(args.input_files, args.database):
+        sys.exit(1)
+
+
+def export_to_sqlite(input_paths: list[str], database_path: str) -> bool:
+    """Exports `{meta, entries}` files to a SQLite database, each in one transaction."""
+    connection = sqlite3.connect(database_path)
+    try:
+        connection.execute("PRAGMA foreign_keys = ON")
+        # With write-ahead logging, syncing only at checkpoints keeps the database
+        # intact on a crash, though the last committed files may be lost
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.executescript(SCHEMA)
+        has_fts = create_fts_tables(connection)
+
+        success = True
+        for input_path in input_paths:
+            try:
+                with connection:
+                    count = import_file(connection, input_path)
+                logger.info(f"Exported {count} entries from {input_path}")
+            except (IOError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                logger.error(f"Failed to export {input_path}: {e}")
+                success = False
+
+        with connection:
+            connection.executescript(INDEXES)
+            if has_fts:
+                for table in FTS_TABLES:
+                    connection.execute(
+                        f"INSERT INTO {table} ({table}) VALUES ('rebuild')"
+                    )
+        connection.execute("ANALYZE")
+        # Leave a single self-contained file for readers
+        connection.execute("PRAGMA journal_mode = DELETE")
+
+        logger.info(f"Database saved to {database_path}")
+        return success
+    except sqlite3.Error as e:
+        logger.error(f"Failed to export to {database_path}: {e}")
+        return False
+    finally:
+        connection.close()
+
+
+def create_fts_tables(connection: sqlite3.Connection) -> bool:
+    """Creates the full-text indexes, if SQLite was built with FTS5."""
+    try:
+        connection.executescript(FTS_SCHEMA)
+        return True
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Full-text indexes are not available: {e}")
+        return False
+
+
+def import_file(connection: sqlite3.Connection, input_path: str) -> int:
+    """Inserts the entries of a file in batches, replacing an earlier export of it."""
+    meta, entries = iter_entries_json(input_path)
+    lang_key = next((key for key in LAYOUTS if key in meta), None)
+    if not lang_key:
+        raise ValueError("Not a dictionary or phrasebook")
+    layout = LAYOUTS[lang_key]
+    collection_table, entry_table, item_table = layout["tables"]
+    collection_values = (
+        meta["lang"],
+        meta[lang_key],
+        meta.get("source_title"),
+        meta.get("source_link"),
+    )
+
+    # Replace an earlier export of the same source
+    connection.execute(
+        f"DELETE FROM {collection_table} WHERE lang = ? AND {lang_key} = ? AND source_title IS ?",
+        collection_values[:3],
+    )
+    collection_id = get_next_id(connection, collection_table)
+    connection.execute(
+        f"INSERT INTO {collection_table} (id, lang, {lang_key}, source_title, source_link, meta) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            collection_id,
+            *collection_values,
+            json.dumps(meta, ensure_ascii=False),
+        ),
+    )
+
+    # Ids are assigned here so rows can be inserted in batches
+    entry_id = get_next_id(connection, entry_table)
+    item_id = get_next_id(connection, item_table)
+    collection_key, entry_key, item_key = layout["keys"]
+    entry_lists_table, item_lists_table = layout["list_tables"]
+    statements = {
+        "entries": make_insert(
+            entry_table, ("id", collection_key, "position") + layout["entry_columns"]
+        ),
+        "items": make_insert(
+            item_table, ("id", entry_key, "position") + layout["item_columns"]
+        ),
+        "item_lists": make_insert(
+            item_lists_table, (item_key, "field", "position", "value")
+        ),
+    }
+    if entry_lists_table:
+        statements["entry_lists"] = make_insert(
+            entry_lists_table, (entry_key, "field", "position", "value")
+        )
+    rows = {name: [] for name in statements}
+
+    count = 0
+    for entry in entries:
+        rows["entries"].append(
+            (entry_id, collection_id, count)
+            + tuple(entry.get(column) for column in layout["entry_columns"])
+        )
+        if entry_lists_table:
+            rows["entry_lists"].extend(
+                get_list_rows(entry_id, entry, layout["entry_lists"])
+            )
+
+        for position, item in enumerate(entry.get(layout["items_key"]) or []):
+            rows["items"].append(
+                (item_id, entry_id, position)
+                + tuple(item.get(column) for column in layout["item_columns"])
+            )
+            rows["item_lists"].extend(
+                get_list_rows(item_id, item, layout["item_lists"])
+            )
+            item_id += 1
+
+        entry_id += 1
+        count += 1
+        if count % BATCH_SIZE == 0:
+            insert_rows(connection, statements, rows)
+    insert_rows(connection, statements, rows)
+
+    return count
+
+
+def get_next_id(connection: sqlite3.Connection, table: str) -> int:
+    return connection.execute(
+        f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}"
+    ).fetchone()[0]
+
+
+def make_insert(table: str, columns: tuple[str, ...]) -> str:
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def get_list_rows(parent_id: int, data: dict, fields: Iterable[str]) -> Iterable[tuple]:
+    """Gets the rows of the list fields of an entry, definition or translation."""
+    for field in fields:
+        for position, value in enumerate(data.get(field) or []):
+            yield parent_id, field, position, value
+
+
+def insert_rows(
+    connection: sqlite3.Connection, statements: dict[str, str], rows: dict[str, list]
+) -> None:
+    """Inserts and clears the collected rows of each table."""
+    for name, statement in statements.items():
+        if rows[name]:
+            connection.executemany(statement, rows[name])
+            rows[name].clear()
+
+
+if __name__ == "__main__":
+    main()
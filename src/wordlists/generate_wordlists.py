@@ -1,59 +1,163 @@
+import argparse
+import heapq
 import json
+import os
+import shutil
 from pathlib import Path
-from utils.logger import logger
+from typing import Iterable, Iterator
+from utils.logger import add_log_arguments, configure_logging_from_args, logger
 from utils.graceful_exit import on_exit
+from utils.json_stream import iter_entries_json
+from utils.parallel import add_worker_arguments, map_chunked
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
+# Distinct words kept in memory before they are written as a sorted run
+DEFAULT_RUN_SIZE = 500_000
+# Most run files open at once while merging
+MERGE_FAN_IN = 128
 
 
 def main():
+    argparser = argparse.ArgumentParser(
+        description="Generate word lists from parsed dictionaries."
+    )
+    add_worker_arguments(argparser, default_workers=0, chunk_unit=None)
+    argparser.add_argument(
+        "--run-size",
+        type=int,
+        default=DEFAULT_RUN_SIZE,
+        help=f"Distinct words a worker holds in memory before writing them to disk. Defaults to {DEFAULT_RUN_SIZE}.",
+    )
+    add_log_arguments(argparser)
+    args = argparser.parse_args()
+    configure_logging_from_args(args)
+
     dictionaries_dir = SCRIPT_DIR.parent / "dictionaries"
-    word_lists: dict[str, set[str]] = {}
+    runs_dir = SCRIPT_DIR / "parsed" / f".runs_{os.getpid()}"
+    # Sorted run files of each language
+    word_lists: dict[str, list[str]] = {}
 
     on_exit(
-        lambda: export_word_lists(word_lists),
+        lambda: export_word_lists(word_lists, runs_dir),
         message="Process interrupted. Saving word lists...",
     )
 
-    generate_word_lists(dictionaries_dir, word_lists)
-    export_word_lists(word_lists)
+    generate_word_lists(
+        dictionaries_dir, word_lists, runs_dir, args.workers, args.run_size
+    )
+    export_word_lists(word_lists, runs_dir)
 
 
 def generate_word_lists(
-    dictionaries_dir: Path, word_lists: dict[str, set[str]]
+    dictionaries_dir: Path,
+    word_lists: dict[str, list[str]],
+    runs_dir: Path,
+    workers: int = 0,
+    run_size: int = DEFAULT_RUN_SIZE,
 ) -> bool:
-    """Generates word lists from parsed dictionaries."""
-    for file_path in dictionaries_dir.glob("*/parsed/*.json"):
-        logger.info(f"Processing file: {file_path}")
-
-        with file_path.open("r", encoding="utf-8") as file:
-            data = json.load(file)
-            lang = data["meta"]["lang"]
-
-            word_lists.setdefault(lang, set())
+    """Generates sorted runs of the words of parsed dictionaries, a file per worker at a time."""
+    file_paths = sorted(dictionaries_dir.glob("*/parsed/*.json"))
+    tasks = [
+        (str(file_path), str(runs_dir / f"run_{index:05d}"), run_size)
+        for index, file_path in enumerate(file_paths)
+    ]
 
-            for entry in data["entries"]:
-                word_lists[lang].add(entry["word"])
+    for lang, run_paths in map_chunked(extract_runs, tasks, workers, chunk_size=1):
+        if lang is not None:
+            word_lists.setdefault(lang, []).extend(run_paths)
 
     logger.info(f"Generated {len(word_lists)} word lists.")
     return True
 
 
-def export_word_lists(word_lists: dict[str, set[str]]) -> bool:
-    """Exports word lists to JSON files."""
+def extract_runs(task: tuple[str, str, int]) -> tuple[str | None, list[str]]:
+    """Streams the words of a dictionary into sorted, deduplicated run files.
+
+    Returns the language of the dictionary and the paths of its runs.
+    """
+    file_path, run_prefix, run_size = task
+    logger.info(f"Processing file: {file_path}")
+
+    try:
+        meta, entries = iter_entries_json(file_path)
+        lang = meta["lang"]
+
+        run_paths = []
+        words = set()
+        for entry in entries:
+            words.add(entry["word"])
+            if len(words) >= run_size:
+                run_paths.append(
+                    write_run(f"{run_prefix}_{len(run_paths)}", sorted(words))
+                )
+                words = set()
+        if words:
+            run_paths.append(write_run(f"{run_prefix}_{len(run_paths)}", sorted(words)))
+    except (IOError, ValueError, KeyError) as e:
+        logger.error(f"Failed to read {file_path}: {e}")
+        return None, []
+
+    return lang, run_paths
+
+
+def write_run(path: str, words: Iterable[str]) -> str:
+    """Writes sorted words to a run file, one JSON string per line."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        for word in words:
+            file.write(json.dumps(word, ensure_ascii=False) + "\n")
+    return path
+
+
+def merge_runs(run_paths: list[str]) -> Iterator[str]:
+    """Merges sorted run files into one sorted stream without duplicates."""
+    files = [open(path, "r", encoding="utf-8") for path in run_paths]
+    try:
+        previous = None
+        for word in heapq.merge(
+            *((json.loads(line) for line in file) for file in files)
+        ):
+            if word != previous:
+                yield word
+                previous = word
+    finally:
+        for file in files:
+            file.close()
+
+
+def export_word_lists(word_lists: dict[str, list[str]], runs_dir: Path) -> bool:
+    """Exports word lists to text files, merging the runs of each language."""
     if not word_lists:
         logger.warning("No word lists to export.")
+        shutil.rmtree(runs_dir, ignore_errors=True)
         return False
 
     output_dir = SCRIPT_DIR / "parsed"
     output_dir.mkdir(exist_ok=True)
 
-    for lang, words in word_lists.items():
-        output_path = output_dir / f"wordlist_{lang}.txt"
-        with output_path.open("w", encoding="utf-8") as file:
-            sorted_words = sorted(words)
-            file.writelines("\n".join(sorted_words))
+    try:
+        for lang, run_paths in word_lists.items():
+            # Merge consecutive groups first to limit the number of open files
+            index = 0
+            while len(run_paths) > MERGE_FAN_IN:
+                merged = []
+                for start in range(0, len(run_paths), MERGE_FAN_IN):
+                    merged.append(
+                        write_run(
+                            str(runs_dir / f"merged_{lang}_{index:05d}"),
+                            merge_runs(run_paths[start : start + MERGE_FAN_IN]),
+                        )
+                    )
+                    index += 1
+                run_paths = merged
+
+            output_path = output_dir / f"wordlist_{lang}.txt"
+            with output_path.open("w", encoding="utf-8") as file:
+                for index, word in enumerate(merge_runs(run_paths)):
+                    file.write(f"\n{word}" if index else word)
+    finally:
+        shutil.rmtree(runs_dir, ignore_errors=True)
 
     logger.info(f"Word lists successfully exported to {output_dir}.")
     return True
@@ -0,0 +1,69 @@
+import pytest
+from dictionaries.pinoy_dictionary import scraper
+
+
+WELL_FORMED = b"""<!DOCTYPE html>
+<html>
+<head><title>Words starting with A</title></head>
+<body>
+  <div class="header"><a href="/">Home</a></div>
+  <div class="word-group">
+    <div class="word"><h2 class="word-entry"><a href="https://tagalog.pinoydictionary.com/word/aso/">aso</a></h2></div>
+    <div class="definition"><p>dog</p></div>
+  </div>
+  <div class="word-group featured">
+    <div class="word"><h2 class="word-entry"><a href="https://tagalog.pinoydictionary.com/word/bahay/">bahay</a></h2></div>
+    <div class="definition"><p>house; <em>home</em> &amp; dwelling</p></div>
+  </div>
+  <ul class="pagination"><li><a href="/list/a/2/">2</a></li></ul>
+</body>
+</html>
+"""
+
+MALFORMED = b"""<html><body>
+<div class="word-group">
+  <div class="word"><h2 class="word-entry"><a href=https://tagalog.pinoydictionary.com/word/araw/>araw</a></h2>
+  <div class="definition"><p>sun; day<br>
+</div></div>
+<div class="word-group">
+  <div class="word"><h2 class="word-entry"><a href="https://tagalog.pinoydictionary.com/word/ibon/">ibon</h2></div>
+  <div class="definition"><p>bird &copy <b>unclosed</div>
+</div>
+</span>
+<div class="word-group">
+  <div class="word"><h2 class="word-entry">no link</h2></div>
+  <div class="definition"><p>skipped</p></div>
+</div>
+<div class="word-groups"><p>not an entry</p></div>
+"""
+
+NO_ENTRIES = b"""<html><body><p>No words found.</p></body></html>"""
+
+
+def extract_with(html_parser: str, page: bytes) -> list[dict] | None:
+    scraper.set_html_parser(html_parser)
+    try:
+        return scraper.extract_entries(page)
+    finally:
+        scraper.set_html_parser("html.parser")
+
+
+@pytest.mark.parametrize(
+    "page",
+    [WELL_FORMED, MALFORMED, NO_ENTRIES],
+    ids=["well-formed", "malformed", "no-entries"],
+)
+def test_lxml_matches_html_parser(page):
+    assert extract_with("lxml", page) == extract_with("html.parser", page)
+
+
+def test_extract_entries():
+    entries = extract_with("lxml", WELL_FORMED)
+
+    assert [entry["word"] for entry in entries] == ["aso", "bahay"]
+    assert entries[1]["definition"] == "<p>house; <em>home</em> &amp; dwelling</p>"
+    assert entries[0]["source"] == "https://tagalog.pinoydictionary.com/word/aso/"
+
+
+def test_no_entries():
+    assert extract_with("lxml", NO_ENTRIES) is None